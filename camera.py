@@ -1,39 +1,150 @@
+import atexit
 import subprocess
 import logging
+import threading
+from typing import List, Optional
 
-def capture_image(path: str) -> bool:
+# ffmpeg keeps /dev/video0 open and writes a JPEG stream to stdout. The camera
+# already encodes MJPEG, so frames are copied through without re-encoding;
+# mjpeg2jpeg inserts the default Huffman tables that UVC frames leave out, so
+# the saved files are valid JPEGs. The low capture frame rate keeps the reader
+# thread mostly idle between captures.
+FFMPEG_COMMAND: List[str] = [
+    'ffmpeg',
+    '-loglevel', 'error',
+    '-f', 'v4l2',
+    '-input_format', 'mjpeg',
+    '-framerate', '5',
+    '-video_size', '1280x960',
+    '-i', '/dev/video0',
+    '-c:v', 'copy',
+    '-bsf:v', 'mjpeg2jpeg',
+    '-f', 'image2pipe',
+    '-'
+]
+
+_JPEG_SOI = b'\xff\xd8'
+_JPEG_EOI = b'\xff\xd9'
+
+_ffmpeg_process: Optional[subprocess.Popen] = None
+_latest_frame: Optional[bytes] = None
+_frame_ready = threading.Condition()
+_start_lock = threading.Lock()
+
+
+def _read_frames(proc: subprocess.Popen) -> None:
     """
-    Captures an image from a V4L2 device using ffmpeg.
+    Reads the ffmpeg JPEG stream and keeps the most recent complete frame.
+
+    Args:
+        proc (subprocess.Popen): The running ffmpeg process.
+    """
+    global _latest_frame
+    buf = bytearray()
+    while True:
+        chunk = proc.stdout.read(65536)
+        if not chunk:
+            break
+        buf += chunk
+        while True:
+            start = buf.find(_JPEG_SOI)
+            if start < 0:
+                # Keep the last byte in case a marker is split across reads.
+                del buf[:-1]
+                break
+            end = buf.find(_JPEG_EOI, start + 2)
+            if end < 0:
+                del buf[:start]
+                break
+            frame = bytes(buf[start:end + 2])
+            del buf[:end + 2]
+            with _frame_ready:
+                _latest_frame = frame
+                _frame_ready.notify_all()
+    with _frame_ready:
+        _frame_ready.notify_all()
+
+
+def _ensure_stream() -> subprocess.Popen:
+    """
+    Starts the long-running ffmpeg process and its reader thread if they are not running.
+
+    Returns:
+        subprocess.Popen: The running ffmpeg process.
+
+    Raises:
+        FileNotFoundError: If ffmpeg is not installed.
+    """
+    global _ffmpeg_process, _latest_frame
+    with _start_lock:
+        if _ffmpeg_process is not None and _ffmpeg_process.poll() is None:
+            return _ffmpeg_process
+        proc = subprocess.Popen(
+            FFMPEG_COMMAND,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        with _frame_ready:
+            _latest_frame = None
+        threading.Thread(target=_read_frames, args=(proc,), name="camera-reader", daemon=True).start()
+        _ffmpeg_process = proc
+        return proc
+
+
+def stop_camera() -> None:
+    """Stops the background ffmpeg process, if it is running."""
+    global _ffmpeg_process
+    with _start_lock:
+        proc = _ffmpeg_process
+        _ffmpeg_process = None
+    if proc is not None and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+atexit.register(stop_camera)
+
+
+def capture_image(path: str, timeout: float = 5.0) -> bool:
+    """
+    Saves the latest frame from the V4L2 device to a file.
+
+    The first call starts a persistent ffmpeg process; later calls only write
+    the most recent frame it produced, without reopening the camera.
 
     Args:
         path (str): The file path where the image will be saved.
+        timeout (float): Seconds to wait for the first frame after ffmpeg starts.
 
     Returns:
         bool: True if the image was captured successfully, False otherwise.
     """
-    command = [
-        'ffmpeg',
-        '-f', 'v4l2',
-        '-input_format', 'yuyv422',
-        '-video_size', '1280x960',
-        '-i', '/dev/video0',
-        '-frames:v', '1',
-        '-q:v', '2',
-        '-y', path
-    ]
     try:
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
-        )
-        logging.info(f"Image captured successfully and saved to {path}")
-        return True
+        proc = _ensure_stream()
     except FileNotFoundError:
         logging.error("ffmpeg command not found. Please ensure ffmpeg is installed and in your PATH.")
         return False
-    except subprocess.CalledProcessError as e:
-        logging.error(f"ffmpeg failed with exit code {e.returncode}")
-        logging.error(f"ffmpeg stderr: {e.stderr.decode().strip()}")
+
+    with _frame_ready:
+        _frame_ready.wait_for(lambda: _latest_frame is not None or proc.poll() is not None, timeout)
+        frame = _latest_frame
+
+    if frame is None:
+        if proc.poll() is not None:
+            logging.error(f"ffmpeg failed with exit code {proc.returncode}")
+        else:
+            logging.error(f"No frame received from ffmpeg within {timeout}s")
+        return False
+
+    try:
+        with open(path, 'wb') as f:
+            f.write(frame)
+    except OSError as e:
+        logging.error(f"Could not save image to {path}: {e}")
         return False
+    logging.info(f"Image captured successfully and saved to {path}")
+    return True
@@ -1,44 +1,173 @@
 import os
 import glob
-import Adafruit_DHT
-import RPi.GPIO as GPIO
-
-# --- I2C Initialization ---
-# This I2C bus is shared across sensor modules to avoid re-initialization.
-try:
-    import board
-    import busio
-    i2c = busio.I2C(board.SCL, board.SDA)
-except (NotImplementedError, NameError, AttributeError):
-    print("Warning: Could not initialize I2C bus. This is expected on non-Raspberry Pi systems.")
-    i2c = None
+import shutil
+import logging
+import functools
+import subprocess
+from dataclasses import dataclass
+from typing import Any, Optional
 
+import Adafruit_DHT
 
-# --- GPIO Setup ---
-GPIO.setmode(GPIO.BCM)
+log = logging.getLogger(__name__)
 
 # --- Relej Setup ---
 RELAY1 = 12  # IN1
 RELAY2 = 16  # IN2
-GPIO.setup(RELAY1, GPIO.OUT, initial=GPIO.HIGH)  # OFF by default (LOW-trigger)
-GPIO.setup(RELAY2, GPIO.OUT, initial=GPIO.HIGH)
+
+
+# --- Hardware Initialization ---
+@dataclass(frozen=True)
+class Hardware:
+    """Hardware handles shared by the sensor and relay modules."""
+    i2c: Optional[Any]
+    # The RPi.GPIO module with the relay pins set up, or None without GPIO hardware.
+    gpio: Optional[Any] = None
+
+
+def _has_gpio() -> bool:
+    """
+    Checks whether the host has Raspberry Pi GPIO hardware.
+
+    Pi 1-4 expose /dev/gpiomem, the Pi 5 only /dev/gpiomem0-4 (used through the
+    rpi-lgpio shim); the device tree model catches setups without either node.
+
+    Returns:
+        bool: True if a GPIO memory device exists or the board reports itself as a Raspberry Pi.
+    """
+    if glob.glob("/dev/gpiomem*"):
+        return True
+    try:
+        with open("/proc/device-tree/model", "rb") as f:
+            return b"Raspberry Pi" in f.read()
+    except OSError:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def hw() -> Hardware:
+    """
+    Configures the GPIO pins and opens the shared I2C bus.
+
+    Runs once per process; later calls return the same Hardware instance, so
+    modules that only need paths or pin numbers can import config without
+    touching the hardware. With CHILLI_NO_HW set, or on a host without Raspberry Pi
+    GPIO, nothing is initialized (and a warning says why) and RPi.GPIO is never
+    imported; relays.py takes RPi.GPIO only from the returned Hardware.
+
+    Returns:
+        Hardware: The initialized hardware handles.
+    """
+    if os.environ.get("CHILLI_NO_HW"):
+        log.warning("Skipping GPIO/I2C setup: CHILLI_NO_HW is set.")
+        return Hardware(i2c=None)
+    if not _has_gpio():
+        log.warning("Skipping GPIO/I2C setup: no Raspberry Pi GPIO device (/dev/gpiomem*) found.")
+        return Hardware(i2c=None)
+
+    import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup([RELAY1, RELAY2], GPIO.OUT, initial=GPIO.HIGH)  # OFF by default (LOW-trigger)
+
+    # This I2C bus is shared across sensor modules to avoid re-initialization.
+    try:
+        import board
+        import busio
+        i2c = busio.I2C(board.SCL, board.SDA)
+    except (NotImplementedError, NameError, AttributeError):
+        log.warning("Could not initialize I2C bus. This is expected on non-Raspberry Pi systems.")
+        i2c = None
+    return Hardware(i2c=i2c, gpio=GPIO)
+
 
 # --- DHT22 Setup ---
 DHT_SENSOR = Adafruit_DHT.DHT22
 DHT_PIN = 27
 
 # --- DS18B20 Setup ---
-os.system('modprobe w1-gpio')
-os.system('modprobe w1-therm')
 base_dir = '/sys/bus/w1/devices/'
-try:
-    device_folder = glob.glob(base_dir + '28-*')[0]
-    device_file = device_folder + '/w1_slave'
-except IndexError:
-    print("Warning: DS18B20 sensor not found. Please check the connection.")
-    device_file = None
 
 
+@functools.lru_cache(maxsize=1)
+def _load_w1_modules() -> None:
+    """Loads the 1-Wire kernel modules, at most once per process, if the bus is not present yet."""
+    if os.path.isdir(base_dir):
+        return
+    # One modprobe process loads both modules; /sbin is often missing from PATH.
+    modprobe = shutil.which('modprobe') or '/sbin/modprobe'
+    try:
+        subprocess.run([modprobe, '-a', 'w1-gpio', 'w1-therm'], check=False)
+    except OSError as e:
+        log.warning("Could not load 1-Wire kernel modules: %s", e)
+
+
+def _find_w1_device(prefix: str) -> Optional[str]:
+    """
+    Returns the path of the first 1-Wire device whose name starts with prefix.
+
+    Args:
+        prefix (str): The device family prefix, e.g. '28-' for DS18B20.
+
+    Returns:
+        Optional[str]: The device directory, or None if there is none (or no 1-Wire bus).
+    """
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix):
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
+
+# Resolved sensor file path; None until a sensor has been found.
+_ds18b20_file: Optional[str] = None
+# Set once the missing-sensor warning was logged, so it is not repeated on every read.
+_ds18b20_missing_warned = False
+
+
+def ds18b20_device_file() -> Optional[str]:
+    """
+    Locates the DS18B20 sysfs file, loading the 1-Wire kernel modules if needed.
+
+    Kernels with a recent w1_therm driver expose a 'temperature' file that holds just
+    the CRC-checked reading in millidegrees; it is preferred over the two-line 'w1_slave'
+    dump, which older kernels only provide.
+
+    A found path is cached for the life of the process (until reset_ds18b20_device_file());
+    the directory is only scanned again while no sensor has been found. A missing sensor
+    is logged once, not on every call.
+
+    Returns:
+        Optional[str]: Path to the sensor's 'temperature' or 'w1_slave' file, or None if no sensor is found.
+    """
+    global _ds18b20_file, _ds18b20_missing_warned
+    if _ds18b20_file is None:
+        _load_w1_modules()
+        device_folder = _find_w1_device('28-')
+        if device_folder is None:
+            if not _ds18b20_missing_warned:
+                log.warning("DS18B20 sensor not found. Please check the connection.")
+                _ds18b20_missing_warned = True
+            return None
+        temperature_file = device_folder + '/temperature'
+        _ds18b20_file = temperature_file if os.path.exists(temperature_file) else device_folder + '/w1_slave'
+    return _ds18b20_file
+
+
+def reset_ds18b20_device_file() -> None:
+    """Forgets the cached DS18B20 path, e.g. after the sensor disappeared from the bus."""
+    global _ds18b20_file, _ds18b20_missing_warned
+    _ds18b20_file = None
+    _ds18b20_missing_warned = False
+
+
+# --- Web Server ---
+# Request threads of the webserver. Sensor reads can hold a thread for seconds (the DHT22
+# alone up to ~6 s), so there are always at least 4, even on a single-core Pi Zero.
+WEB_THREADS = max(4, min(2 * (os.cpu_count() or 1), 16))
+
 # --- Paths ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CALIB_FILE = os.path.join(BASE_DIR, "soil_calibration.json")
@@ -1,52 +1,528 @@
+import atexit
+import contextlib
+import hashlib
+import logging
+import re
+import sys
+import time
 import sqlite3
-import datetime
-from typing import List, Optional
+import functools
+import threading
+from collections import deque, namedtuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
 
-from config import DB_FILE
+from config import DB_FILE, WEB_THREADS
+
+log = logging.getLogger(__name__)
+
+# Per-connection settings; these are not persisted and must be set on every connect.
+# mmap_size (128 MiB) lets reads map database pages instead of copying them with read();
+# lower it on boards with little RAM.
+_CONNECTION_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA busy_timeout=5000;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+PRAGMA mmap_size=134217728;
+"""
+
+# Compiled statements kept per connection. Every SQL string is built once and reused
+# verbatim, so the cache only needs room for the multi-row INSERT variants (one per
+# batch size, for both tables) plus the fixed queries.
+STATEMENT_CACHE_SIZE = 256
+
+# One connection per thread, opened lazily and kept for the life of the process.
+_conn_local = threading.local()
+
+# Connections handed back by short-lived threads (e.g. Flask request threads) through
+# release_connection(), reused by the next thread instead of opening a new one. Sized
+# to the webserver's request threads, so each of them can find an idle connection.
+IDLE_CONNECTIONS_MAX = WEB_THREADS
+_idle_connections: List[sqlite3.Connection] = []
+_idle_lock = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns the calling thread's persistent database connection, opening it on first use.
+
+    The connection runs in autocommit mode (isolation_level=None) with WAL journaling,
+    so single-statement writes do not pay for a separate open/fsync cycle. A 5 s busy
+    timeout lets the logger and the webserver wait for each other's writes. Rows are
+    returned as sqlite3.Row, which supports both index and column-name access.
+
+    Returns:
+        sqlite3.Connection: The thread's database connection object.
+    """
+    conn = getattr(_conn_local, "conn", None)
+    if conn is None:
+        conn = _conn_local.conn = _borrow_connection()
+    return conn
+
+
+def _borrow_connection() -> sqlite3.Connection:
+    """Takes an idle connection from the pool, or opens and configures a new one."""
+    with _idle_lock:
+        if _idle_connections:
+            return _idle_connections.pop()
+    conn = sqlite3.connect(
+        DB_FILE,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    # journal_mode is stored in the database file, so only switch it once.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            log.warning("WAL nije dostupan, journal_mode=%s", mode)
+    conn.executescript(_CONNECTION_PRAGMAS)
+    return conn
+
+
+def _return_connection(conn: sqlite3.Connection) -> None:
+    """Puts a connection back into the idle pool, or closes it if the pool is full."""
+    if conn.in_transaction:
+        conn.rollback()
+    with _idle_lock:
+        if len(_idle_connections) < IDLE_CONNECTIONS_MAX:
+            _idle_connections.append(conn)
+            return
+    conn.close()
+
+
+def close_db_connection() -> None:
+    """
+    Closes the calling thread's persistent database connection, if one is open.
+
+    Runs PRAGMA optimize first so SQLite can refresh statistics for the indexes.
+    """
+    conn = getattr(_conn_local, "conn", None)
+    if conn is not None:
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
+        _conn_local.conn = None
+
+
+def release_connection() -> None:
+    """
+    Hands the calling thread's connection back for reuse by another thread.
+
+    Meant for threads that end after a single task, such as the webserver's request
+    threads; long-lived threads simply keep their connection. Connections beyond
+    IDLE_CONNECTIONS_MAX are closed.
+    """
+    conn = getattr(_conn_local, "conn", None)
+    if conn is None:
+        return
+    _conn_local.conn = None
+    _return_connection(conn)
+
+
+def _close_idle_connections() -> None:
+    """Closes every connection waiting for reuse."""
+    with _idle_lock:
+        while _idle_connections:
+            _idle_connections.pop().close()
+
+
+atexit.register(close_db_connection)
+atexit.register(_close_idle_connections)
+
+
+@contextlib.contextmanager
+def _transaction(conn: sqlite3.Connection, mode: str = "IMMEDIATE") -> Iterator[sqlite3.Connection]:
+    """
+    Runs the block in one explicit transaction: BEGIN <mode>, then COMMIT, or ROLLBACK on error.
+
+    The connection is in autocommit mode (isolation_level=None), so sqlite3 never
+    opens transactions implicitly and the batch boundaries are exactly these.
+
+    Args:
+        conn (sqlite3.Connection): The connection to run the transaction on.
+        mode (str): "DEFERRED", "IMMEDIATE" or "EXCLUSIVE".
+    """
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# ------------------ WRITE QUEUE ------------------
+_INSERT_LOG_HEAD = """
+    INSERT INTO logs (timestamp, dht22_air_temp, dht22_humidity,
+                      ds18b20_soil_temp, soil_raw, soil_voltage,
+                      soil_percent, lux, stable, ts)
+    VALUES """
+_LOG_ROW_VALUES = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# The event time is bound as a Unix epoch and formatted by SQLite, so no datetime
+# object is built per event; it is captured at enqueue time, not at flush time.
+_INSERT_RELAY_HEAD = "INSERT INTO relay_log (timestamp, ts, relay_name, action, source) VALUES "
+_RELAY_ROW_VALUES = "(strftime('%Y-%m-%d %H:%M:%S', ?, 'unixepoch', 'localtime'), ?, ?, ?, ?)"
+
+# Batches up to this size are written as one multi-row INSERT; 99 rows of the
+# 10-column logs table stay below SQLite's default limit of 999 bound parameters.
+MULTI_ROW_INSERT_MAX = 99
+
+# Pending rows are written in one transaction once either limit is reached.
+FLUSH_MAX_ROWS = 64
+FLUSH_MAX_SECONDS = 5.0
+# Rows a queue may hold while the database is unavailable; newer rows are dropped beyond this.
+PENDING_MAX_ROWS = 1000
+
+_pending_logs: Deque[Tuple] = deque()
+_pending_relay: Deque[Tuple] = deque()
+# _queue_lock guards the deques and is only held for a few appends; _flush_lock
+# serializes writers and is held across the database write itself.
+_queue_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flusher_thread: Optional[threading.Thread] = None
+
+
+def _flusher() -> None:
+    """Background loop that writes queued rows every FLUSH_MAX_SECONDS or when woken."""
+    while True:
+        _flush_wakeup.wait(FLUSH_MAX_SECONDS)
+        _flush_wakeup.clear()
+        try:
+            flush_pending()
+        except sqlite3.Error as e:
+            log.error("Upis reda čekanja nije uspio: %s", e)
+
+
+def _enqueue(queue: Deque[Tuple], row: Tuple) -> None:
+    """
+    Appends a row to a write queue, starting the flusher thread on first use.
+
+    Never blocks on the database: if the queue is full (PENDING_MAX_ROWS) because
+    writes keep failing, the row is dropped with a warning.
+    """
+    global _flusher_thread
+    with _queue_lock:
+        if len(queue) >= PENDING_MAX_ROWS:
+            log.warning("Red čekanja je pun (%d), zapis odbačen.", PENDING_MAX_ROWS)
+            return
+        queue.append(row)
+        pending = len(_pending_logs) + len(_pending_relay)
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(target=_flusher, name="db-flusher", daemon=True)
+            _flusher_thread.start()
+    if pending >= FLUSH_MAX_ROWS:
+        _flush_wakeup.set()
+
+
+@functools.lru_cache(maxsize=None)
+def _multi_row_sql(head: str, row_values: str, n: int) -> str:
+    """Builds (once per batch size) an INSERT statement with n VALUES tuples."""
+    return head + ",".join([row_values] * n)
+
+
+def _insert_rows(conn: sqlite3.Connection, head: str, row_values: str, rows: List[Tuple]) -> None:
+    """
+    Inserts rows with a single multi-row INSERT, or executemany for large batches.
+
+    Args:
+        conn (sqlite3.Connection): The connection to insert through.
+        head (str): The statement up to and including 'VALUES '.
+        row_values (str): The placeholder tuple for one row.
+        rows (List[Tuple]): The rows to insert.
+    """
+    if len(rows) <= MULTI_ROW_INSERT_MAX:
+        conn.execute(_multi_row_sql(head, row_values, len(rows)), [v for row in rows for v in row])
+    else:
+        # The memoized single-row statement: the same string on every call, so it stays cached.
+        conn.executemany(_multi_row_sql(head, row_values, 1), rows)
+
+
+def flush_pending() -> None:
+    """
+    Writes all queued log and relay rows in a single BEGIN IMMEDIATE/COMMIT transaction.
+
+    Read paths in the same process call this first so they never miss queued rows.
+    On failure the rows are put back at the front of their queues. New rows can be
+    queued while the write is in progress.
+    """
+    with _flush_lock:
+        with _queue_lock:
+            if not _pending_logs and not _pending_relay:
+                return
+            logs = list(_pending_logs)
+            relay = list(_pending_relay)
+            _pending_logs.clear()
+            _pending_relay.clear()
+
+        try:
+            with _transaction(get_connection()) as conn:
+                if logs:
+                    _insert_rows(conn, _INSERT_LOG_HEAD, _LOG_ROW_VALUES, logs)
+                if relay:
+                    _insert_rows(conn, _INSERT_RELAY_HEAD, _RELAY_ROW_VALUES, relay)
+        except sqlite3.Error:
+            with _queue_lock:
+                _pending_logs.extendleft(reversed(logs))
+                _pending_relay.extendleft(reversed(relay))
+            raise
+
+
+atexit.register(flush_pending)
+
+
+# Schema DDL, run as one script so a fresh database is created in a single transaction.
+_LOGS_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    dht22_air_temp REAL,
+    dht22_humidity REAL,
+    ds18b20_soil_temp REAL,
+    soil_raw REAL,
+    soil_voltage REAL,
+    soil_percent REAL,
+    lux REAL,
+    stable INTEGER DEFAULT 1,
+    ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+DROP INDEX IF EXISTS idx_logs_ts;
+CREATE INDEX IF NOT EXISTS idx_logs_soil_percent ON logs(soil_percent);
+-- One row counting delete operations on logs; see get_logs_version().
+CREATE TABLE IF NOT EXISTS logs_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    deletes INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO logs_meta (id) VALUES (0);
+"""
+
+_RELAY_LOG_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS relay_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    ts INTEGER,
+    relay_name TEXT,
+    action TEXT,
+    source TEXT
+);
+"""
+
+_SCHEMA_SQL = "BEGIN;" + _LOGS_SCHEMA_SQL + _RELAY_LOG_SCHEMA_SQL + "COMMIT;"
+
+
+# Columns added after the first release: (table, column, declaration).
+_ADDED_COLUMNS: List[Tuple[str, str, str]] = [
+    ("logs", "lux", "REAL"),
+    ("logs", "stable", "INTEGER DEFAULT 1"),
+    ("logs", "ts", "INTEGER"),
+    ("relay_log", "ts", "INTEGER"),
+]
+
+# Fills the Unix-epoch 'ts' column from the local-time TEXT timestamps of older rows.
+# logs.timestamp is written as '%Y-%m-%d_%H-%M-%S', relay_log.timestamp as '%Y-%m-%d %H:%M:%S'.
+_BACKFILL_TS_SQL = """
+UPDATE logs
+   SET ts = CAST(strftime('%s', substr(timestamp, 1, 10) || ' ' || replace(substr(timestamp, 12), '-', ':'), 'utc') AS INTEGER)
+ WHERE ts IS NULL;
+UPDATE relay_log
+   SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+ WHERE ts IS NULL;
+-- logs is only filtered and ordered by id/timestamp, so logs.ts gets no index.
+DROP INDEX IF EXISTS idx_logs_epoch;
+CREATE INDEX IF NOT EXISTS idx_relay_log_epoch ON relay_log(ts);
+DROP INDEX IF EXISTS idx_relay_log_ts;
+"""
+
+# Fingerprint of the schema and migrations above, stored in PRAGMA application_id once
+# they have been applied. Editing any of them changes the value, so the next init_db()
+# re-runs the (idempotent) setup without a version number to bump by hand.
+_SCHEMA_ID = int.from_bytes(
+    hashlib.blake2b((_SCHEMA_SQL + repr(_ADDED_COLUMNS) + _BACKFILL_TS_SQL).encode(), digest_size=4).digest(),
+    "big",
+    signed=True,
+)
 
 
 def init_db() -> sqlite3.Connection:
     """
-    Initializes the database and the 'logs' table if it doesn't exist.
-    Also adds 'lux' and 'stable' columns if they are missing.
+    Initializes the database and the 'logs' and 'relay_log' tables if they don't exist.
+    Also adds columns missing from older databases ('lux', 'stable' and the Unix-epoch
+    'ts'), backfills 'ts' from the TEXT timestamps, and creates the indexes used by
+    time- and moisture-range filters.
+
+    Databases whose application_id matches the current schema fingerprint are
+    returned without any DDL or introspection.
 
     Returns:
         sqlite3.Connection: The database connection object.
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection()
     c = conn.cursor()
+    if c.execute("PRAGMA application_id").fetchone()[0] == _SCHEMA_ID:
+        return conn
+
+    conn.executescript(_SCHEMA_SQL)
 
-    # Create the 'logs' table if it doesn't exist
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            dht22_air_temp REAL,
-            dht22_humidity REAL,
-            ds18b20_soil_temp REAL,
-            soil_raw REAL,
-            soil_voltage REAL,
-            soil_percent REAL,
-            lux REAL,
-            stable INTEGER DEFAULT 1
-        )
-    """)
-    conn.commit()
-
-    # Check for and add missing columns for backward compatibility
-    c.execute("PRAGMA table_info(logs)")
-    cols = [row[1] for row in c.fetchall()]
-    if "lux" not in cols:
-        print("[DB] Dodajem stupac 'lux' u tablicu logs...")
-        c.execute("ALTER TABLE logs ADD COLUMN lux REAL")
-        conn.commit()
-    if "stable" not in cols:
-        print("[DB] Dodajem stupac 'stable' u tablicu logs...")
-        c.execute("ALTER TABLE logs ADD COLUMN stable INTEGER DEFAULT 1;")
-        conn.commit()
+    # Apply the whole migration in one transaction: one commit, and no half-migrated schema.
+    # The fingerprint and the missing columns are read again under the EXCLUSIVE lock, since
+    # another process or thread may have migrated the database since the check above.
+    with _transaction(conn, "EXCLUSIVE"):
+        if c.execute("PRAGMA application_id").fetchone()[0] == _SCHEMA_ID:
+            return conn
+        missing = [
+            (table, column, decl) for table, column, decl in _ADDED_COLUMNS
+            if c.execute(f"SELECT 1 FROM pragma_table_info('{table}') WHERE name=?", (column,)).fetchone() is None
+        ]
+        for table, column, decl in missing:
+            log.info("Dodajem stupac '%s' u tablicu %s...", column, table)
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        for statement in _BACKFILL_TS_SQL.split(";"):
+            if statement.strip():
+                c.execute(statement)
+        c.execute(f"PRAGMA application_id = {_SCHEMA_ID}")
     return conn
 
 
+_schema_ready = False
+
+
+def ensure_schema() -> None:
+    """
+    Ensures the tables and indexes exist, running init_db() once per process.
+
+    A process that never calls init_db() itself (the webserver) thus also migrates
+    an older database before its first query.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    init_db()
+    _schema_ready = True
+
+
+# One "N" or "N-M" item plus its trailing comma (or the end of the string).
+_ID_RANGE_RE = re.compile(r"\s*(\d+)\s*(?:-\s*(\d+))?\s*(,|$)")
+
+
+def parse_id_ranges(ids: str) -> List[Tuple[int, int]]:
+    """
+    Parses an ID specification into sorted, merged, inclusive ranges.
+
+    Args:
+        ids (str): A comma-separated string of IDs or ID ranges (e.g., "1,3,5-10").
+
+    Returns:
+        List[Tuple[int, int]]: Non-overlapping (start, end) pairs, e.g. [(1, 1), (3, 3), (5, 10)].
+
+    Raises:
+        ValueError: If a part is not an integer or an integer range.
+    """
+    ranges: List[Tuple[int, int]] = []
+    pos = 0
+    while True:
+        m = _ID_RANGE_RE.match(ids, pos)
+        if m is None:
+            raise ValueError(f"Neispravan popis ID-eva: {ids!r}")
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else start
+        if start <= end:
+            ranges.append((start, end))
+        pos = m.end()
+        if not m.group(3):
+            break
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# Run in the same transaction as every delete from logs, so get_logs_version() changes.
+_SQL_COUNT_DELETE = "UPDATE logs_meta SET deletes = deletes + 1 WHERE id = 0"
+
+# Ranges per DELETE statement; keeps the bound parameters well under SQLite's 999 limit.
+_DELETE_RANGES_PER_STATEMENT = 200
+
+
+def _id_ranges_predicate(ranges: List[Tuple[int, int]]) -> Tuple[str, List[int]]:
+    """
+    Builds a WHERE predicate matching the given inclusive id ranges.
+
+    Runs of more than one id become "id BETWEEN ? AND ?" and single ids are
+    collected into one "id IN (...)", so the statement grows with the number of
+    ranges rather than the number of ids.
+
+    Args:
+        ranges (List[Tuple[int, int]]): (start, end) pairs as returned by parse_id_ranges().
+
+    Returns:
+        Tuple[str, List[int]]: The predicate SQL and its parameters.
+    """
+    clauses: List[str] = []
+    params: List[int] = []
+    singles: List[int] = []
+    for start, end in ranges:
+        if start == end:
+            singles.append(start)
+        else:
+            clauses.append("id BETWEEN ? AND ?")
+            params.extend((start, end))
+    if singles:
+        clauses.append(f"id IN ({','.join('?' * len(singles))})")
+        params.extend(singles)
+    return " OR ".join(clauses), params
+
+
+def delete_log_ranges(ranges: List[Tuple[int, int]]) -> int:
+    """
+    Deletes the log records in the given id ranges in a single transaction.
+
+    Args:
+        ranges (List[Tuple[int, int]]): (start, end) pairs as returned by parse_id_ranges().
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    if not ranges:
+        return 0
+    flush_pending()
+    ensure_schema()
+    deleted = 0
+    with _transaction(get_connection()) as conn:
+        for i in range(0, len(ranges), _DELETE_RANGES_PER_STATEMENT):
+            where, params = _id_ranges_predicate(ranges[i:i + _DELETE_RANGES_PER_STATEMENT])
+            deleted += conn.execute(f"DELETE FROM logs WHERE {where}", params).rowcount
+        if deleted:
+            conn.execute(_SQL_COUNT_DELETE)
+    return deleted
+
+
+def delete_all_logs(reset_ids: bool = False) -> None:
+    """
+    Deletes every record from the 'logs' table in a single transaction.
+
+    Args:
+        reset_ids (bool): If True, also resets the AUTOINCREMENT counter so new ids start at 1.
+    """
+    flush_pending()
+    ensure_schema()
+    with _transaction(get_connection()) as conn:
+        conn.execute("DELETE FROM logs")
+        conn.execute(_SQL_COUNT_DELETE)
+        if reset_ids:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name='logs'")
+
+
 def delete_sql_data(ids: Optional[str] = None, delete_all: bool = False) -> None:
     """
     Deletes log records from the database.
@@ -55,88 +531,367 @@ def delete_sql_data(ids: Optional[str] = None, delete_all: bool = False) -> None
         ids (Optional[str]): A comma-separated string of IDs or ID ranges (e.g., "1,3,5-10").
         delete_all (bool): If True, deletes all records. This requires a confirmation prompt.
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
     if delete_all:
         confirm = input("⚠️  Sigurno želiš obrisati SVE podatke iz baze? (yes/no): ")
         if confirm.lower() == "yes":
-            c.execute("DELETE FROM logs")
-            c.execute("DELETE FROM sqlite_sequence WHERE name='logs'")  # reset autoincrement
-            conn.commit()
+            delete_all_logs(reset_ids=True)
             print("✅ Svi zapisi obrisani i indeks resetiran.")
         else:
             print("❌ Otkazano brisanje svih zapisa.")
     elif ids:
         try:
-            id_list: List[int] = []
-            for part in ids.split(","):
-                part = part.strip()
-                if "-" in part:
-                    start, end = map(int, part.split("-"))
-                    id_list.extend(range(start, end + 1))
-                else:
-                    id_list.append(int(part))
-
-            id_list = sorted(list(set(id_list)))
-            placeholders = ",".join("?" for _ in id_list)
-            c.execute(f"DELETE FROM logs WHERE id IN ({placeholders})", id_list)
-            conn.commit()
-            print(f"✅ Obrisani zapisi s ID-evima: {id_list}")
+            ranges = parse_id_ranges(ids)
         except ValueError:
             print("❌ Greška: ID-evi moraju biti brojevi, npr. 1,3,5 ili 3-10.")
+            return
+
+        delete_log_ranges(ranges)
+        shown = ", ".join(str(s) if s == e else f"{s}-{e}" for s, e in ranges)
+        print(f"✅ Obrisani zapisi s ID-evima: {shown}")
     else:
         print("⚠️ Nisi naveo ni --all ni --ids za brisanje.")
 
-    conn.close()
+
+def insert_log(
+    timestamp: str,
+    air_temp: Optional[float],
+    air_humidity: Optional[float],
+    soil_temp: Optional[float],
+    soil_raw: Optional[int],
+    soil_voltage: Optional[float],
+    soil_percent: Optional[float],
+    lux: Optional[float],
+    stable: int = 1,
+    ts: Optional[int] = None,
+) -> None:
+    """
+    Queues one sensor reading for insertion into the 'logs' table.
+
+    The row is written by the background flusher together with any other pending rows.
+
+    Args:
+        timestamp (str): The reading time, formatted as '%Y-%m-%d_%H-%M-%S'.
+        air_temp (Optional[float]): DHT22 air temperature in Celsius.
+        air_humidity (Optional[float]): DHT22 relative humidity in percent.
+        soil_temp (Optional[float]): DS18B20 soil temperature in Celsius.
+        soil_raw (Optional[int]): Raw ADS1115 value.
+        soil_voltage (Optional[float]): ADS1115 voltage.
+        soil_percent (Optional[float]): Soil moisture percentage.
+        lux (Optional[float]): BH1750 light intensity.
+        stable (int, optional): Stability flag. Defaults to 1.
+        ts (Optional[int], optional): The reading time as Unix seconds. Defaults to now.
+    """
+    if ts is None:
+        ts = int(time.time())
+    _enqueue(_pending_logs, (
+        timestamp, air_temp, air_humidity, soil_temp, soil_raw,
+        soil_voltage, soil_percent, lux, stable, ts,
+    ))
+
+
+def insert_logs_bulk(rows: List[Tuple[Any, ...]]) -> int:
+    """
+    Writes many sensor readings to the 'logs' table in a single transaction.
+
+    Intended for backfills and other bursts; the rows bypass the write queue, which is
+    flushed first so ids stay in insertion order.
+
+    Args:
+        rows (List[Tuple[Any, ...]]): Tuples in insert_log() argument order
+            (timestamp, air_temp, air_humidity, soil_temp, soil_raw, soil_voltage,
+            soil_percent, lux, stable, ts), with ts given explicitly.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if not rows:
+        return 0
+    flush_pending()
+    with _flush_lock, _transaction(get_connection()) as conn:
+        _insert_rows(conn, _INSERT_LOG_HEAD, _LOG_ROW_VALUES, rows)
+    return len(rows)
+
+
+# ------------------ LOG QUERIES ------------------
+_LOG_COLUMNS = """
+    id, timestamp,
+    dht22_air_temp AS air_temp,
+    dht22_humidity AS air_humidity,
+    ds18b20_soil_temp AS soil_temp,
+    soil_raw, soil_voltage, soil_percent, lux, stable
+"""
+# The newest N rows, returned oldest-first or newest-first. The SQL text never
+# changes, so sqlite3's per-connection statement cache reuses the prepared statement.
+_SQL_LOGS_ASC = f"SELECT * FROM (SELECT {_LOG_COLUMNS} FROM logs ORDER BY id DESC LIMIT ?) ORDER BY id ASC"
+_SQL_LOGS_DESC = f"SELECT {_LOG_COLUMNS} FROM logs ORDER BY id DESC LIMIT ?"
+
+# Identifiers and keywords a WHERE filter from the web UI may contain.
+_WHERE_WORDS = frozenset({
+    "id", "timestamp", "dht22_air_temp", "air_temp", "dht22_humidity", "air_humidity",
+    "ds18b20_soil_temp", "soil_temp", "soil_raw", "soil_voltage", "soil_percent", "lux", "stable",
+    "and", "or", "not", "between", "is", "null", "like", "glob", "in",
+})
+_WHERE_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<num>-?\d+(?:\.\d+)?)|(?P<str>'(?:[^']|'')*')|(?P<op><=|>=|!=|<>|=|<|>|\(|\)|,)"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_]*))"
+)
+
+
+def _rows_to_dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Converts all remaining sqlite3.Row results of a cursor into plain dictionaries."""
+    return [dict(row) for row in cursor]
+
+
+@functools.lru_cache(maxsize=8)
+def _row_type(columns: Tuple[str, ...]) -> type:
+    """Creates (once per column list) the namedtuple class used for query rows."""
+    return namedtuple("LogRow", columns)
+
+
+def _rows_to_namedtuples(cursor: sqlite3.Cursor) -> List[Tuple]:
+    """Converts all remaining plain-tuple rows of a cursor into namedtuples."""
+    make = _row_type(tuple(d[0] for d in cursor.description))._make
+    return list(map(make, cursor))
+
+
+@functools.lru_cache(maxsize=64)
+def _build_where_query(where_clause: str) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Validates a WHERE clause against the allowed tokens and builds the full query.
+
+    Numbers and quoted strings become ? parameters, so filters that differ only in
+    their values ("soil_percent > 40" / "soil_percent > 35") share one SQL text and
+    thus one prepared statement in the connection's cache.
+
+    Args:
+        where_clause (str): The filter, e.g. "soil_percent > 40 AND lux < 1000".
+
+    Returns:
+        Tuple[str, Tuple[Any, ...]]: The complete SELECT statement and its parameters.
+
+    Raises:
+        ValueError: If the clause contains anything other than known columns,
+            comparison operators, parentheses and commas, numbers, quoted strings
+            ('' escapes a quote) and AND/OR/NOT/BETWEEN/IS/NULL/LIKE/GLOB/IN.
+    """
+    pos = 0
+    clause = where_clause.strip()
+    parts: List[str] = []
+    params: List[Any] = []
+    while pos < len(clause):
+        m = _WHERE_TOKEN_RE.match(clause, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Nedozvoljen izraz u filteru: {clause[pos:]!r}")
+        word, num, text = m.group("word", "num", "str")
+        if word is not None:
+            if word.lower() not in _WHERE_WORDS:
+                raise ValueError(f"Nedozvoljen stupac ili ključna riječ: {word!r}")
+            parts.append(word.lower())
+        elif num is not None:
+            parts.append("?")
+            params.append(float(num) if "." in num else int(num))
+        elif text is not None:
+            parts.append("?")
+            params.append(text[1:-1].replace("''", "'"))
+        else:
+            parts.append(m.group("op"))
+        pos = m.end()
+    return f"SELECT {_LOG_COLUMNS} FROM logs WHERE {' '.join(parts)} ORDER BY id ASC", tuple(params)
+
+
+def get_logs(limit: int = 100, order: str = "asc") -> List[Dict[str, Any]]:
+    """
+    Retrieves the newest log entries.
+
+    Args:
+        limit (int): The maximum number of rows to return.
+        order (str): "asc" to return them oldest-first, "desc" for newest-first.
+
+    Returns:
+        List[Dict[str, Any]]: The log rows, with UI-friendly column aliases.
+    """
+    sql = _SQL_LOGS_DESC if order == "desc" else _SQL_LOGS_ASC
+    return _rows_to_dicts(get_connection().execute(sql, (limit,)))
+
+
+def get_log_rows(limit: int = 100) -> List[Tuple]:
+    """
+    Retrieves the newest log entries, oldest-first, as namedtuples.
+
+    Intended for server-side rendering, where fields are read as attributes
+    (row.air_temp) and no per-row dict is needed.
+
+    Args:
+        limit (int): The maximum number of rows to return.
+
+    Returns:
+        List[Tuple]: LogRow namedtuples with UI-friendly field names.
+    """
+    c = get_connection().cursor()
+    c.row_factory = None
+    c.execute(_SQL_LOGS_ASC, (limit,))
+    return _rows_to_namedtuples(c)
+
+
+def iter_logs_where(where_clause: str = "") -> Iterator[Dict[str, Any]]:
+    """
+    Runs a log query and returns an iterator that converts rows as they are fetched.
+
+    The clause is validated and the query started before returning, so errors are
+    raised here rather than during iteration. The query runs on a connection of its
+    own, taken from the idle pool and returned when the iterator is exhausted or
+    closed, so the iterator may outlive the calling thread's connection (e.g. in a
+    streamed response, whose request is torn down before the first chunk).
+
+    Args:
+        where_clause (str): An optional filter; see _build_where_query for what is allowed.
+
+    Returns:
+        Iterator[Dict[str, Any]]: The matching log rows, ordered by id, with UI-friendly column aliases.
+
+    Raises:
+        ValueError: If the WHERE clause is not allowed.
+    """
+    if where_clause.strip():
+        sql, params = _build_where_query(where_clause)
+    else:
+        sql, params = f"SELECT {_LOG_COLUMNS} FROM logs ORDER BY id ASC", ()
+    rows = _owned_query(sql, params)
+    next(rows)  # runs the query now; errors propagate from here
+    return rows
+
+
+def _owned_query(sql: str, params: Tuple[Any, ...]) -> Iterator[Any]:
+    """
+    Runs a query on a borrowed connection and yields its rows as dicts.
+
+    Yields None once the query has started, then the rows. The connection goes back
+    to the pool when the generator finishes, fails or is closed (including when a
+    started generator is garbage-collected).
+    """
+    conn = _borrow_connection()
+    cursor = None
+    try:
+        cursor = conn.execute(sql, params)
+        yield None
+        for row in cursor:
+            yield dict(row)
+    finally:
+        if cursor is not None:
+            cursor.close()
+        _return_connection(conn)
+
+
+def get_logs_where(where_clause: str = "") -> List[Dict[str, Any]]:
+    """
+    Retrieves all log entries matching a WHERE clause, ordered by id.
+
+    Args:
+        where_clause (str): An optional filter; see _build_where_query for what is allowed.
+
+    Returns:
+        List[Dict[str, Any]]: The matching log rows, with UI-friendly column aliases.
+
+    Raises:
+        ValueError: If the WHERE clause is not allowed.
+    """
+    return list(iter_logs_where(where_clause))
+
+
+def get_logs_version() -> Tuple[int, int]:
+    """
+    Returns a token that changes whenever rows are added to or deleted from the logs table.
+
+    Logs are only ever appended (with a new, higher id) or deleted (through
+    delete_log_ranges/delete_all_logs, which count each delete in logs_meta), so the
+    highest id together with that counter identifies the table contents; callers use it
+    to key cached query results. Both are single B-tree lookups, so the cost does not
+    grow with the table.
+
+    Returns:
+        Tuple[int, int]: The highest log id (0 if empty) and the number of deletes so far.
+    """
+    ensure_schema()
+    return tuple(get_connection().execute(
+        "SELECT coalesce((SELECT max(id) FROM logs), 0), (SELECT deletes FROM logs_meta WHERE id = 0)"
+    ).fetchone())
 
 
 def get_sql_data() -> None:
     """
     Retrieves and prints all logs from the database.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM logs")
-    rows = c.fetchall()
-    for row in rows:
-        print(row)
-    conn.close()
 
-# ------------------ RELAY LOG ------------------
-def ensure_relay_log_table() -> None:
-    """Ensures the 'relay_log' table exists in the database."""
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS relay_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            relay_name TEXT,
-            action TEXT,
-            source TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    Rows are fetched in batches of 1000 and each batch is written with one call,
+    so memory use does not grow with the table size.
+    """
+    flush_pending()
+    c = get_connection().cursor()
+    c.row_factory = None
+    c.arraysize = 1000
+    c.execute("SELECT * FROM logs ORDER BY id")
+    write = sys.stdout.write
+    rows = c.fetchmany()
+    while rows:
+        write("\n".join(map(str, rows)) + "\n")
+        rows = c.fetchmany()
 
 
+# ------------------ RELAY LOG ------------------
 def insert_relay_event(relay_name: str, action: str, source: str = "button") -> None:
     """
-    Inserts a relay ON/OFF event into the 'relay_log' table.
+    Queues a relay ON/OFF event for insertion into the 'relay_log' table.
 
     Args:
         relay_name (str): The name of the relay (e.g., "RELAY1").
         action (str): The action performed ("ON" or "OFF").
         source (str, optional): The source of the event. Defaults to "button".
     """
-    ensure_relay_log_table()
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cur.execute(
-        "INSERT INTO relay_log (timestamp, relay_name, action, source) VALUES (?, ?, ?, ?)",
-        (ts, relay_name, action, source),
-    )
-    conn.commit()
-    conn.close()
+    ensure_schema()
+    now = time.time()
+    _enqueue(_pending_relay, (now, int(now), relay_name, action, source))
+
+
+def get_relay_log_version() -> int:
+    """
+    Returns a token that changes whenever a relay event is logged.
+
+    Relay events are only ever appended (nothing deletes them), so the highest id
+    identifies the table contents. Queued events are written first, so the token
+    covers events logged by this process.
+
+    Returns:
+        int: The highest relay_log id, or 0 if the table is empty.
+    """
+    flush_pending()
+    ensure_schema()
+    return get_connection().execute("SELECT coalesce(max(id), 0) FROM relay_log").fetchone()[0]
+
+
+# Events formatted for display by SQLite: 'dd.mm.YYYY HH:MM:SS' local time (NULL for a
+# malformed timestamp) and upper-cased names, so callers do no per-row parsing.
+_SQL_RELAY_EVENTS = """
+SELECT strftime('%d.%m.%Y %H:%M:%S', timestamp), upper(relay_name), upper(action), source
+  FROM relay_log ORDER BY ts DESC, id DESC LIMIT ?
+"""
+
+
+def get_relay_events(limit: int = 10) -> List[Tuple[Optional[str], str, str, Optional[str]]]:
+    """
+    Retrieves the most recent relay events, formatted for display.
+
+    Args:
+        limit (int): The maximum number of events to retrieve.
+
+    Returns:
+        List[Tuple[Optional[str], str, str, Optional[str]]]: (time as 'dd.mm.YYYY HH:MM:SS',
+            relay name, action, source) tuples, newest first; the time is None if the
+            stored timestamp is malformed. Names and actions are upper-case.
+    """
+    flush_pending()
+    ensure_schema()
+    cur = get_connection().cursor()
+    cur.row_factory = None
+    # idx_relay_log_epoch stores (ts, id), so this is a backwards index scan with no sort,
+    # and events logged within the same second keep their insertion order
+    cur.execute(_SQL_RELAY_EVENTS, (limit,))
+    return cur.fetchall()
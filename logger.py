@@ -1,19 +1,21 @@
 import time
 import datetime
 import os
-import glob
 import argparse
-import RPi.GPIO as GPIO
+import signal
+import threading
 import logging
 from typing import Optional
 
-from relays import init_relays, test_relays, set_relay_state, RELAY1
-from config import LOGS_DIR, DHT_SENSOR, DHT_PIN, STATUS_FILE
-from database import init_db, delete_sql_data, get_sql_data
+from relays import init_relays, test_relays, set_relay_state, cleanup_gpio, RELAY1
+from config import LOGS_DIR, STATUS_FILE
+from database import (
+    init_db, close_db_connection, flush_pending, insert_log,
+    insert_relay_event, delete_sql_data, get_sql_data
+)
 from sensors import (
     test_dht, test_ads, test_ds18b20, calibrate_ads,
-    read_ds18b20_temp, read_soil_raw_shared, read_soil_raw_fresh,
-    read_soil_percent_from_voltage, read_bh1750_lux
+    read_all_sensors, read_soil_percent_from_voltage
 )
 
 # --- Logging Setup ---
@@ -29,49 +31,144 @@ WATERING_DURATION = 10         # sekundi
 WATERING_COOLDOWN = 3600       # sekundi (1h)
 LAST_WATERING_FILE = "last_watering.txt"
 
-def cleanup_old_images(folder: str, months: int = 3) -> None:
+# koliko često brisati stare slike
+CLEANUP_INTERVAL = 24 * 3600   # sekundi (1 dan)
+_MONTH_SECONDS = 30 * 24 * 3600
+
+def _atomic_write(path: str, text: str, sync: bool = False) -> None:
+    """
+    Writes a small text file atomically: to a temporary file first, then renamed over the target.
+
+    Args:
+        path (str): The destination file.
+        text (str): The file contents.
+        sync (bool): If True, fsync the data before the rename.
+    """
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, text.encode())
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
+def _round3(value: Optional[float]) -> Optional[float]:
+    """Rounds a sensor reading to 3 decimals, passing None through."""
+    return None if value is None else round(value, 3)
+
+
+def cleanup_old_images(folder: str, months: int = 3, now: Optional[float] = None) -> None:
     """Removes JPG files older than a specified number of months from a folder."""
-    now = time.time()
-    cutoff = now - (months * 30 * 24 * 3600)
-    for f in glob.glob(os.path.join(folder, "*.jpg")):
-        try:
-            if os.path.getmtime(f) < cutoff:
-                os.remove(f)
-                logging.info(f"Removed old image: {f}")
-        except OSError as e:
-            logging.error(f"Error removing file {f}: {e}")
+    if now is None:
+        now = time.time()
+    cutoff = now - months * _MONTH_SECONDS
+    try:
+        entries = os.scandir(folder)
+    except OSError as e:
+        logging.error(f"Error scanning {folder}: {e}")
+        return
+    with entries:
+        for entry in entries:
+            # is_file() uses the d_type from readdir, so no extra stat here
+            if not entry.name.endswith(".jpg") or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.remove(entry.path)
+                    logging.info(f"Removed old image: {entry.path}")
+            except OSError as e:
+                logging.error(f"Error removing file {entry.path}: {e}")
 
 
-def should_water(soil_percent: Optional[float]) -> bool:
-    """Provjerava prag vlage i cooldown."""
-    if soil_percent is None:
-        return False
+# vrijeme zadnjeg zalijevanja; učitava se s diska samo jednom
+_last_watering_ts: Optional[float] = None
 
-    if soil_percent >= WATERING_THRESHOLD:
-        return False
 
-    if os.path.exists(LAST_WATERING_FILE):
+def _get_last_watering_ts() -> float:
+    """Vraća vrijeme zadnjeg zalijevanja, čitajući LAST_WATERING_FILE samo pri prvom pozivu."""
+    global _last_watering_ts
+    if _last_watering_ts is None:
         try:
             with open(LAST_WATERING_FILE, "r") as f:
-                last_ts = float(f.read().strip())
-            if time.time() - last_ts < WATERING_COOLDOWN:
-                logging.info("Preskačem zalijevanje (cooldown).")
-                return False
-        except Exception:
-            pass
+                _last_watering_ts = float(f.read().strip())
+        except (OSError, ValueError):
+            _last_watering_ts = 0.0
+    return _last_watering_ts
+
+
+def should_water(soil_percent: Optional[float], now: Optional[float] = None) -> bool:
+    """Provjerava prag vlage i cooldown; now je vrijeme očitanja (zadano: trenutno vrijeme)."""
+    if soil_percent is None or soil_percent >= WATERING_THRESHOLD:
+        return False
+
+    if now is None:
+        now = time.time()
+    if now - _get_last_watering_ts() < WATERING_COOLDOWN:
+        logging.info("Preskačem zalijevanje (cooldown).")
+        return False
 
     return True
 
 
-def perform_watering() -> None:
-    """Aktivira pumpu uz safety logiku."""
-    logging.info(f"Uključujem pumpu na {WATERING_DURATION}s ...")
-    set_relay_state(RELAY1, True)
-    time.sleep(WATERING_DURATION)
-    set_relay_state(RELAY1, False)
-    with open(LAST_WATERING_FILE, "w") as f:
-        f.write(str(time.time()))
-    logging.info("Zalijevanje završeno.")
+# stanje pumpe dok zalijevanje traje
+_watering_off_at: Optional[float] = None
+_watering_timer: Optional[threading.Timer] = None
+_watering_lock = threading.Lock()
+
+
+def start_watering() -> None:
+    """
+    Uključuje pumpu i odmah se vraća; isključivanje je zakazano za WATERING_DURATION sekundi.
+
+    Logger za to vrijeme nastavlja čitati senzore.
+    """
+    global _watering_off_at, _watering_timer
+    with _watering_lock:
+        if _watering_off_at is not None:
+            return
+        logging.info(f"Uključujem pumpu na {WATERING_DURATION}s ...")
+        set_relay_state(RELAY1, True)
+        insert_relay_event("RELAY1", "ON", source="auto")
+        _watering_off_at = time.monotonic() + WATERING_DURATION
+        _watering_timer = threading.Timer(WATERING_DURATION, maybe_stop_watering, kwargs={"force": True})
+        _watering_timer.daemon = True
+        _watering_timer.start()
+
+
+def maybe_stop_watering(force: bool = False) -> bool:
+    """
+    Isključuje pumpu ako je zalijevanje u tijeku i rok je istekao (ili ako je force=True).
+
+    Args:
+        force (bool): Isključi pumpu bez obzira na preostalo vrijeme.
+
+    Returns:
+        bool: True ako je pumpa upravo isključena.
+    """
+    global _watering_off_at, _watering_timer, _last_watering_ts
+    with _watering_lock:
+        if _watering_off_at is None:
+            return False
+        if not force and time.monotonic() < _watering_off_at:
+            return False
+        set_relay_state(RELAY1, False)
+        insert_relay_event("RELAY1", "OFF", source="auto")
+        _watering_off_at = None
+        if _watering_timer is not None:
+            _watering_timer.cancel()
+            _watering_timer = None
+        _last_watering_ts = time.time()
+        _atomic_write(LAST_WATERING_FILE, str(_last_watering_ts))
+        logging.info("Zalijevanje završeno.")
+        return True
+
+
+def _handle_sigterm(signum, frame) -> None:
+    """Pretvara SIGTERM (npr. iz webservera) u KeyboardInterrupt kako bi se izvršio finally blok."""
+    raise KeyboardInterrupt
 
 
 def run_logger(cold_first: bool = False) -> None:
@@ -79,51 +176,36 @@ def run_logger(cold_first: bool = False) -> None:
     now = datetime.datetime.now().strftime("%d.%m.%Y. u %H:%M:%S")
     pid = os.getpid()
 
-    with open(STATUS_FILE, "w") as f:
-        f.write(f"{now} (PID: {pid})")
-        f.flush()
-        os.fsync(f.fileno())
+    _atomic_write(STATUS_FILE, f"{now} (PID: {pid})", sync=True)
 
     init_relays()
-    conn = init_db()
-    c = conn.cursor()
+    init_db()
+    _get_last_watering_ts()  # jedino čitanje LAST_WATERING_FILE, pri pokretanju
     os.makedirs(LOGS_DIR, exist_ok=True)
+    last_cleanup: Optional[float] = None
+    # bez ovoga SIGTERM prekida proces bez pražnjenja reda čekanja za bazu
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+    # odluke koje se ne mijenjaju tijekom rada donose se jednom, prije petlje
+    mode_tag = "COLD" if cold_first else "SHARED"
 
     try:
         while True:
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+            maybe_stop_watering()
 
-            lux = read_bh1750_lux()
+            now = time.time()
+            timestamp = datetime.datetime.fromtimestamp(now).strftime('%Y-%m-%d_%H-%M-%S')
 
-            if cold_first:
-                soil_raw, soil_voltage = read_soil_raw_fresh()
-            else:
-                soil_raw, soil_voltage = read_soil_raw_shared()
+            soil_raw, soil_voltage, lux, humidity, temperature, temp_ds18b20 = read_all_sensors(cold_first)
             soil_percent = read_soil_percent_from_voltage(soil_voltage)
 
-            humidity, temperature = None, None
-            try:
-                import Adafruit_DHT
-                humidity, temperature = Adafruit_DHT.read_retry(DHT_SENSOR, DHT_PIN)
-            except Exception as e:
-                logging.error(f"DHT22 Greška: {e}")
-
-            temp_ds18b20 = read_ds18b20_temp()
-
-            humidity = round(humidity, 3) if humidity is not None else None
-            temperature = round(temperature, 3) if temperature is not None else None
-            temp_ds18b20 = round(temp_ds18b20, 3) if temp_ds18b20 is not None else None
-            soil_voltage = round(soil_voltage, 3) if soil_voltage is not None else None
-            soil_percent = round(soil_percent, 3) if soil_percent is not None else None
+            humidity, temperature, temp_ds18b20, soil_voltage, soil_percent = map(
+                _round3, (humidity, temperature, temp_ds18b20, soil_voltage, soil_percent)
+            )
 
             stable_flag = 1
 
-            c.execute("""
-                INSERT INTO logs (timestamp, dht22_air_temp, dht22_humidity,
-                                  ds18b20_soil_temp, soil_raw, soil_voltage,
-                                  soil_percent, lux, stable)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            insert_log(
                 timestamp,
                 temperature,
                 humidity,
@@ -132,11 +214,10 @@ def run_logger(cold_first: bool = False) -> None:
                 soil_voltage,
                 soil_percent,
                 lux,
-                stable_flag
-            ))
-            conn.commit()
+                stable_flag,
+                int(now)
+            )
 
-            mode_tag = "COLD" if cold_first else "SHARED"
             logging.info(
                 f"({mode_tag}) "
                 f"Temp zraka:{temperature}C, Vlaga:{humidity}%, "
@@ -144,43 +225,43 @@ def run_logger(cold_first: bool = False) -> None:
                 f"Lux:{lux}, STABLE={stable_flag}"
             )
 
-            cleanup_old_images(LOGS_DIR, months=3)
+            if last_cleanup is None or now - last_cleanup >= CLEANUP_INTERVAL:
+                cleanup_old_images(LOGS_DIR, months=3, now=now)
+                last_cleanup = now
             time.sleep(2400)
 
     except KeyboardInterrupt:
         logging.info("Zaustavljeno od strane korisnika.")
     finally:
-        GPIO.cleanup()
-        conn.close()
+        maybe_stop_watering(force=True)
+        cleanup_gpio()
+        try:
+            flush_pending()
+        except Exception as e:
+            logging.error(f"Upis preostalih zapisa nije uspio: {e}")
+        close_db_connection()
         if os.path.exists(STATUS_FILE):
             os.remove(STATUS_FILE)
 
 
 if __name__ == "__main__":
+    handlers = {
+        "run_first": lambda args: run_logger(cold_first=True),
+        "test_ads": lambda args: test_ads(),
+        "test_dht": lambda args: test_dht(),
+        "test_ds18b20": lambda args: test_ds18b20(),
+        "test_relays": lambda args: test_relays(),
+        "calibrate_ads": lambda args: calibrate_ads(dry=args.dry, wet=args.wet),
+        "get_sql_data": lambda args: get_sql_data(),
+        "delete_sql_data": lambda args: delete_sql_data(ids=args.ids, delete_all=args.all),
+    }
+
     parser = argparse.ArgumentParser()
-    parser.add_argument("mode", choices=[
-        "run_first", "test_ads", "test_dht", "test_ds18b20",
-        "test_relays", "calibrate_ads", "get_sql_data", "delete_sql_data"
-    ])
+    parser.add_argument("mode", choices=list(handlers))
     parser.add_argument("--dry", action="store_true")
     parser.add_argument("--wet", action="store_true")
     parser.add_argument("--all", action="store_true")
     parser.add_argument("--ids", type=str)
     args = parser.parse_args()
 
-    if args.mode == "run_first":
-        run_logger(cold_first=True)
-    elif args.mode == "test_ads":
-        test_ads()
-    elif args.mode == "test_dht":
-        test_dht()
-    elif args.mode == "test_ds18b20":
-        test_ds18b20()
-    elif args.mode == "test_relays":
-        test_relays()
-    elif args.mode == "get_sql_data":
-        get_sql_data()
-    elif args.mode == "calibrate_ads":
-        calibrate_ads(dry=args.dry, wet=args.wet)
-    elif args.mode == "delete_sql_data":
-        delete_sql_data(ids=args.ids, delete_all=args.all)
+    handlers[args.mode](args)
@@ -1,13 +1,83 @@
-import RPi.GPIO as GPIO
 import time
-from typing import Dict
+import functools
+import logging
+from typing import Callable, Dict, Optional, Tuple
 
-from config import RELAY1, RELAY2
+from config import RELAY1, RELAY2, hw
+
+try:
+    import lgpio  # optional: writes through the GPIO character device instead of RPi.GPIO
+except ImportError:
+    lgpio = None
+
+log = logging.getLogger(__name__)
+
+# Pin levels (RPi.GPIO.LOW/HIGH and lgpio use the same 0/1); the relay board is LOW-trigger.
+_LOW = 0
+_HIGH = 1
+
+
+@functools.lru_cache(maxsize=1)
+def _gpio_io() -> Tuple[Callable, Callable]:
+    """
+    Returns RPi.GPIO's output and input functions, configuring the pins on first use.
+
+    Bound once, since set_relay_state/get_relay_state run on every relay toggle and
+    status poll. Nothing is imported until a relay is used, so this module imports on
+    hosts without GPIO (CI, development, CHILLI_NO_HW).
+
+    Raises:
+        RuntimeError: If hw() skipped the GPIO setup.
+    """
+    gpio = hw().gpio
+    if gpio is None:
+        raise RuntimeError("GPIO nije dostupan (CHILLI_NO_HW je postavljen ili ovo nije Raspberry Pi).")
+    return gpio.output, gpio.input
+
+
+def _has_relays() -> bool:
+    """Checks whether this process can drive the relays (hw() set up the GPIO pins)."""
+    return hw().gpio is not None
+
+
+# lgpio chip handle holding both relay lines. Only the process that calls init_relays()
+# (the logger) claims them; every other process (the webserver's manual toggles and
+# status reads, the test_relays CLI) goes through RPi.GPIO.
+_lgpio_handle: Optional[int] = None
+
+
+def _claim_lgpio() -> Optional[int]:
+    """
+    Opens gpiochip 0 with lgpio and claims both relay pins, keeping their current levels.
+
+    Returns:
+        Optional[int]: The lgpio chip handle, or None to use RPi.GPIO.
+    """
+    if lgpio is None:
+        return None
+    handle = None
+    try:
+        handle = lgpio.gpiochip_open(0)
+        for pin in (RELAY1, RELAY2):
+            lgpio.gpio_claim_output(handle, pin, _gpio_io()[1](pin))
+    except Exception as e:
+        log.warning("lgpio nije dostupan (%s), koristim RPi.GPIO.", e)
+        if handle is not None:
+            lgpio.gpiochip_close(handle)
+        return None
+    return handle
 
 def init_relays() -> None:
-    """Sets the initial state of both relays to OFF."""
-    set_relay_state(RELAY1, False)
-    set_relay_state(RELAY2, False)
+    """
+    Makes this process the owner of the relay pins and sets both relays to OFF.
+
+    Called once by the logger at startup. If lgpio is installed, the pins are claimed
+    through it and driven with lgpio from here on; otherwise RPi.GPIO is used.
+    """
+    global _lgpio_handle
+    if _lgpio_handle is None:
+        _lgpio_handle = _claim_lgpio()
+    set_all_relays(False)
 
 def set_relay_state(relay: int, state: bool) -> None:
     """
@@ -18,7 +88,12 @@ def set_relay_state(relay: int, state: bool) -> None:
         relay (int): The GPIO pin number of the relay.
         state (bool): True to turn the relay ON, False to turn it OFF.
     """
-    GPIO.output(relay, GPIO.LOW if state else GPIO.HIGH)
+    level = _LOW if state else _HIGH
+    handle = _lgpio_handle
+    if handle is not None:
+        lgpio.gpio_write(handle, relay, level)
+    else:
+        _gpio_io()[0](relay, level)
 
 def get_relay_state(relay: int) -> bool:
     """
@@ -28,9 +103,14 @@ def get_relay_state(relay: int) -> bool:
         relay (int): The GPIO pin number of the relay.
 
     Returns:
-        bool: True if the relay is ON, False if it is OFF.
+        bool: True if the relay is ON, False if it is OFF (always False without GPIO).
     """
-    return GPIO.input(relay) == GPIO.LOW
+    if not _has_relays():
+        return False
+    handle = _lgpio_handle
+    if handle is not None:
+        return lgpio.gpio_read(handle, relay) == _LOW
+    return _gpio_io()[1](relay) == _LOW
 
 def test_relays() -> None:
     """Runs a test sequence to toggle both relays."""
@@ -56,9 +136,14 @@ def test_relays() -> None:
     print("Test završen.")
 
 def set_all_relays(state: bool) -> None:
-    """Sets both relays to the same state."""
-    set_relay_state(RELAY1, state)
-    set_relay_state(RELAY2, state)
+    """Sets both relays to the same state (with a single GPIO.output call on RPi.GPIO)."""
+    level = _LOW if state else _HIGH
+    handle = _lgpio_handle
+    if handle is not None:
+        lgpio.gpio_write(handle, RELAY1, level)
+        lgpio.gpio_write(handle, RELAY2, level)
+    else:
+        _gpio_io()[0]([RELAY1, RELAY2], level)
 
 def get_all_relays() -> Dict[str, bool]:
     """
@@ -71,3 +156,13 @@ def get_all_relays() -> Dict[str, bool]:
         "relay1": get_relay_state(RELAY1),
         "relay2": get_relay_state(RELAY2),
     }
+
+def cleanup_gpio() -> None:
+    """Releases the GPIO pins set up by this process; does nothing without GPIO."""
+    global _lgpio_handle
+    if _lgpio_handle is not None:
+        lgpio.gpiochip_close(_lgpio_handle)
+        _lgpio_handle = None
+    gpio = hw().gpio
+    if gpio is not None:
+        gpio.cleanup()
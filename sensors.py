@@ -1,33 +1,98 @@
 import os
 import json
+import atexit
 import time
 import datetime
-from typing import Tuple, Optional, Dict
+import logging
+import functools
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Tuple, Optional, Dict
 
 import smbus2
+import Adafruit_DHT
 from adafruit_ads1x15.analog_in import AnalogIn
 import adafruit_ads1x15.ads1115 as ADS
 
-from config import CALIB_FILE, device_file, DHT_SENSOR, DHT_PIN, i2c as shared_i2c
+from config import CALIB_FILE, ds18b20_device_file, reset_ds18b20_device_file, DHT_SENSOR, DHT_PIN, hw
 
-def read_soil_raw_shared() -> Tuple[Optional[int], Optional[float]]:
+log = logging.getLogger(__name__)
+
+# Serializes transactions to the ADS1115 and BH1750, which share /dev/i2c-1, between
+# threads (e.g. concurrent webserver requests). Held only around bus access, never
+# across a settle or conversion wait.
+_i2c_lock = threading.Lock()
+
+# Soil readings average a burst of conversions at the fastest data rate: 16 samples
+# at 860 SPS take about as long as one default-rate conversion, with less noise.
+ADS_SAMPLES = 16
+ADS_DATA_RATE = 860
+# Conversions discarded while the input settles after the channel is selected; about
+# 10 ms at 860 SPS. In single-shot mode each one ends as soon as the ADS1115 reports
+# conversion-ready, instead of after a fixed sleep.
+ADS_SETTLE_CONVERSIONS = 8
+# Volts per count at gain 1 (+/-4.096 V full scale over 15 bits), the same factor
+# adafruit_ads1x15 uses for AnalogIn.voltage.
+_ADS_VOLTS_PER_COUNT = 4.096 / 32767
+
+
+def _configure_ads(i2c) -> ADS.ADS1115:
+    """Creates an ADS1115 on the given bus with gain 1 and the burst data rate."""
+    ads = ADS.ADS1115(i2c)
+    ads.gain = 1
+    ads.data_rate = ADS_DATA_RATE
+    return ads
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_soil_channel() -> Optional[AnalogIn]:
+    """Returns the soil channel (P0) of the ADS1115 on the shared I2C bus, created once per process, or None without a bus."""
+    shared_i2c = hw().i2c
+    if not shared_i2c:
+        return None
+    return AnalogIn(_configure_ads(shared_i2c), ADS.P0)
+
+
+# True once the shared channel has been read. P0 is the only channel ever selected on
+# the shared ADS1115, so after that the mux never switches and the input stays settled.
+_shared_ads_settled = False
+
+
+def read_soil_raw_shared(samples: int = ADS_SAMPLES) -> Tuple[Optional[int], Optional[float]]:
     """
     Reads the raw soil moisture value and voltage from the ADS1115 sensor using the shared I2C bus.
 
+    Args:
+        samples (int): Number of conversions to average.
+
     Returns:
         Tuple[Optional[int], Optional[float]]: Raw ADC value and voltage, or (None, None) on failure.
     """
-    if not shared_i2c:
+    global _shared_ads_settled
+    chan = _shared_soil_channel()
+    if chan is None:
+        return None, None
+    try:
+        result = _read_ads_once(chan, samples, settle=not _shared_ads_settled)
+        _shared_ads_settled = True
+        return result
+    except Exception as e:
+        # e.g. a bus glitch or the ADC was power-cycled; rebuild the ADS1115 object
+        # and settle again on the next read
+        _shared_soil_channel.cache_clear()
+        _shared_ads_settled = False
+        log.warning("shared ADS read error: %s", e)
         return None, None
-    ads = ADS.ADS1115(shared_i2c)
-    ads.gain = 1
-    return _read_ads_once(ads)
 
 
-def read_soil_raw_fresh() -> Tuple[Optional[int], Optional[float]]:
+def read_soil_raw_fresh(samples: int = ADS_SAMPLES) -> Tuple[Optional[int], Optional[float]]:
     """
     Reads the raw soil moisture value and voltage from the ADS1115 sensor by creating a new I2C object.
 
+    Args:
+        samples (int): Number of conversions to average.
+
     Returns:
         Tuple[Optional[int], Optional[float]]: Raw ADC value and voltage, or (None, None) on failure.
     """
@@ -35,17 +100,18 @@ def read_soil_raw_fresh() -> Tuple[Optional[int], Optional[float]]:
         import board
         import busio
         i2c = busio.I2C(board.SCL, board.SDA)
-        ads = ADS.ADS1115(i2c)
-        ads.gain = 1
-        raw, voltage = _read_ads_once(ads)
-        del ads
-        del i2c
-        return raw, voltage
+        with _i2c_lock:
+            ads = _configure_ads(i2c)
+        return _read_ads_once(AnalogIn(ads, ADS.P0), samples)
     except Exception as e:
-        print(f"[WARN] fresh ADS read error: {e}")
+        log.warning("fresh ADS read error: %s", e)
         return None, None
 
 
+# Upper bound for one read of the sensor file (w1_slave: two lines of about 37 bytes each).
+W1_SLAVE_READ_SIZE = 128
+
+
 def read_ds18b20_temp() -> Optional[float]:
     """
     Reads the soil temperature from the DS18B20 sensor.
@@ -53,33 +119,132 @@ def read_ds18b20_temp() -> Optional[float]:
     Returns:
         Optional[float]: The temperature in Celsius, or None if the read fails.
     """
+    device_file = ds18b20_device_file()
     if not device_file:
         return None
     try:
-        with open(device_file, 'r') as f:
-            lines = f.readlines()
-        if lines[0].strip()[-3:] != 'YES':
+        # the file is regenerated (and a conversion run) on every open; a plain fd read
+        # skips the buffered file object, and the contents fit in one read
+        fd = os.open(device_file, os.O_RDONLY)
+        try:
+            data = os.read(fd, W1_SLAVE_READ_SIZE)
+        finally:
+            os.close(fd)
+        if device_file.endswith('/temperature'):
+            # just the millidegrees; the driver has already checked the CRC
+            return int(data) / 1000.0
+        # first line ends in "crc=xx YES" when the CRC check passed, the second holds "t=<millidegrees>"
+        if b'YES' not in data[:data.find(b'\n')]:
             return None
-        equals_pos = lines[1].find('t=')
+        equals_pos = data.rfind(b't=')
         if equals_pos != -1:
-            temp_string = lines[1][equals_pos + 2:]
-            return float(temp_string) / 1000.0
+            end = data.find(b'\n', equals_pos)
+            # integer millidegrees; int() parses the bytes directly, without float()'s parser
+            return int(data[equals_pos + 2:end if end != -1 else None]) / 1000.0
+    except FileNotFoundError:
+        # the sensor was unplugged or got a new ID; look it up again next time
+        reset_ds18b20_device_file()
+        return None
     except Exception:
         return None
     return None
 
 
+# Parsed calibration, keyed by the file's mtime (None while the file does not exist),
+# plus the normalized limits derived from it ("norm", built on first use) and the
+# time.monotonic() of the last mtime check ("checked").
+_CALIB_CACHE: Dict[str, Any] = {"mtime": None, "data": None, "norm": None, "checked": None}
+# Minimum time between two stat() calls on the calibration file.
+CALIB_CHECK_INTERVAL_S = 1.0
+
+
+def _refresh_calibration() -> Dict[str, float]:
+    """Re-reads the calibration file if it changed since the last call and returns the cached values."""
+    now = time.monotonic()
+    checked = _CALIB_CACHE["checked"]
+    if _CALIB_CACHE["data"] is not None and checked is not None and now - checked < CALIB_CHECK_INTERVAL_S:
+        return _CALIB_CACHE["data"]
+    _CALIB_CACHE["checked"] = now
+    try:
+        mtime: Optional[int] = os.stat(CALIB_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _CALIB_CACHE["data"] is None or _CALIB_CACHE["mtime"] != mtime:
+        _CALIB_CACHE["data"] = _read_calibration_file(mtime is not None)
+        _CALIB_CACHE["mtime"] = mtime
+        _CALIB_CACHE["norm"] = None
+    return _CALIB_CACHE["data"]
+
+
+def _calibration_limits() -> Tuple[float, float, float]:
+    """
+    Returns the calibration as (dry_v, wet_v, scale), computed once per calibration file version.
+
+    dry_v is the higher voltage, and scale is 100 / (dry_v - wet_v), or 0.0 if the span is empty.
+    """
+    calib = _refresh_calibration()
+    norm = _CALIB_CACHE["norm"]
+    if norm is None:
+        dry_v = float(calib["dry_v"])
+        wet_v = float(calib["wet_v"])
+        if dry_v < wet_v:
+            dry_v, wet_v = wet_v, dry_v
+        span = dry_v - wet_v
+        norm = _CALIB_CACHE["norm"] = (dry_v, wet_v, 100.0 / span if span > 0 else 0.0)
+    return norm
+
+
 def load_calibration() -> Dict[str, float]:
     """
     Loads voltage calibration data from the JSON file.
 
+    The file is parsed again only when its modification time changes; otherwise
+    the cached values are returned. The mtime is checked at most once every
+    CALIB_CHECK_INTERVAL_S seconds, so changes made by another process (e.g.
+    calibrate_ads from the CLI) show up within that interval.
+
+    Returns:
+        Dict[str, float]: A dictionary with 'dry_v' and 'wet_v' keys.
+    """
+    return dict(_refresh_calibration())
+
+
+def _save_calibration(calib: Dict[str, float]) -> None:
+    """
+    Writes the calibration file atomically and updates the cache to match it.
+
+    The JSON goes to a temporary file that is fsynced and then renamed over CALIB_FILE,
+    so a crash or power cut leaves either the old or the new calibration, never a
+    truncated file.
+
+    Args:
+        calib (Dict[str, float]): A dictionary with 'dry_v' and 'wet_v' keys.
+    """
+    tmp_path = CALIB_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(calib, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CALIB_FILE)
+    _CALIB_CACHE["data"] = dict(calib)
+    _CALIB_CACHE["mtime"] = os.stat(CALIB_FILE).st_mtime_ns
+    _CALIB_CACHE["norm"] = None
+
+
+def _read_calibration_file(exists: bool) -> Dict[str, float]:
+    """
+    Parses the calibration JSON file, falling back to default voltage limits.
+
+    Args:
+        exists (bool): Whether CALIB_FILE exists.
+
     Returns:
         Dict[str, float]: A dictionary with 'dry_v' and 'wet_v' keys.
     """
     defDryV = 1.60
     defWetV = 0.20
-    if not os.path.exists(CALIB_FILE):
-        print("[WARN] Calibration file not found -> using defaults")
+    if not exists:
+        log.warning("Calibration file not found -> using defaults")
         return {"dry_v": defDryV, "wet_v": defWetV}
 
     try:
@@ -88,70 +253,66 @@ def load_calibration() -> Dict[str, float]:
         if "dry_v" in obj and "wet_v" in obj:
             return {"dry_v": float(obj["dry_v"]), "wet_v": float(obj["wet_v"])}
         if "dry" in obj and "wet" in obj:  # Legacy format support
-            print("[WARN] Found old RAW calibration; using default V limits (1.60/0.20V)")
+            log.warning("Found old RAW calibration; using default V limits (1.60/0.20V)")
         return {"dry_v": defDryV, "wet_v": defWetV}
     except Exception as e:
-        print(f"[ERROR] Failed to read calibration file: {e} -> using defaults")
+        log.error("Failed to read calibration file: %s -> using defaults", e)
         return {"dry_v": defDryV, "wet_v": defWetV}
 
 
-def _read_ads_once(ads: ADS.ADS1115) -> Tuple[int, float]:
+def _read_ads_once(chan: AnalogIn, samples: int = ADS_SAMPLES, settle: bool = True) -> Tuple[int, float]:
     """
-    Performs a stable read from the ADS1115 ADC.
+    Performs a stable read from the ADS1115 ADC, averaging a burst of conversions.
+
+    Only chan.value is read; the voltage is computed from the averaged raw value, since
+    chan.voltage would start another conversion.
 
     Args:
-        ads (ADS.ADS1115): The ADS1115 object.
+        chan (AnalogIn): The soil channel of an ADS1115 configured with gain 1.
+        samples (int): Number of back-to-back conversions to average.
+        settle (bool): Discard ADS_SETTLE_CONVERSIONS conversions first while the input
+            settles; only needed when the channel may have just been selected.
 
     Returns:
-        Tuple[int, float]: The raw ADC value and the corresponding voltage.
+        Tuple[int, float]: The averaged raw ADC value and the corresponding voltage.
     """
-    chan = AnalogIn(ads, ADS.P0)
-    _ = chan.value
-    time.sleep(0.05)
-    raw = chan.value
-    voltage = chan.voltage
-    return raw, voltage
+    samples = max(1, samples)
+    with _i2c_lock:
+        if settle:
+            for _ in range(ADS_SETTLE_CONVERSIONS):
+                chan.value
+        mean = sum(chan.value for _ in range(samples)) / samples
+    return round(mean), mean * _ADS_VOLTS_PER_COUNT
 
 
 def read_soil_raw() -> Tuple[Optional[int], Optional[float]]:
     """
     Reads the raw soil moisture value and voltage from the ADS1115 sensor.
+
+    Uses the process-wide ADS1115 on the shared I2C bus; a new bus is only created
+    when no shared bus is available.
     """
-    try:
-        import board
-        import busio
-        i2c = busio.I2C(board.SCL, board.SDA)
-        ads = ADS.ADS1115(i2c)
-        ads.gain = 1
-        raw, voltage = _read_ads_once(ads)
-        return raw, voltage
-    except Exception as e:
-        print(f"[WARN] fresh ADS read error: {e}")
-        return None, None
+    if _shared_soil_channel() is not None:
+        return read_soil_raw_shared()
+    return read_soil_raw_fresh()
 
 
-def read_soil_percent_from_voltage(voltage: Optional[float], debug: bool = False) -> float:
+def read_soil_percent_from_voltage(voltage: Optional[float],
+                                   limits: Optional[Tuple[float, float, float]] = None) -> float:
     """
     Converts soil moisture sensor voltage to a percentage based on calibration values.
 
     Args:
         voltage (Optional[float]): The voltage to convert.
-        debug (bool): If True, prints debugging information.
+        limits (Optional[Tuple[float, float, float]]): Calibration as returned by
+            _calibration_limits(), for callers that already have it; looked up if None.
 
     Returns:
         float: The calculated soil moisture percentage (0-100).
     """
-    calib = load_calibration()
-    dry_v = float(calib["dry_v"])
-    wet_v = float(calib["wet_v"])
-
-    if dry_v < wet_v:
-        dry_v, wet_v = wet_v, dry_v
-
-    span = dry_v - wet_v
-    if span <= 0:
-        if debug:
-            print(f"[DEBUG] Invalid calibration span: dry_v={dry_v}, wet_v={wet_v}")
+    dry_v, wet_v, scale = limits if limits is not None else _calibration_limits()
+    if scale == 0.0:
+        log.debug("Invalid calibration span: dry_v=%s, wet_v=%s", dry_v, wet_v)
         return 0.0
 
     if voltage is None:
@@ -162,15 +323,15 @@ def read_soil_percent_from_voltage(voltage: Optional[float], debug: bool = False
     elif voltage <= wet_v:
         percent = 100.0
     else:
-        percent = (dry_v - voltage) * 100.0 / span
+        percent = (dry_v - voltage) * scale
 
-    percent = max(0.0, min(100.0, percent))
-    if debug:
-        print(f"[DEBUG] voltage={voltage:.4f}, dry_v={dry_v:.4f}, wet_v={wet_v:.4f}, span={span:.4f}, percent={percent:.3f}")
+    log.debug("voltage=%.4f, dry_v=%.4f, wet_v=%.4f, span=%.4f, percent=%.3f",
+              voltage, dry_v, wet_v, dry_v - wet_v, percent)
     return round(percent, 3)
 
 
-def read_soil_percent(raw: Optional[int] = None, voltage: Optional[float] = None, debug: bool = False) -> float:
+def read_soil_percent(raw: Optional[int] = None, voltage: Optional[float] = None,
+                      limits: Optional[Tuple[float, float, float]] = None) -> float:
     """
     A wrapper to get the soil moisture percentage.
 
@@ -178,60 +339,231 @@ def read_soil_percent(raw: Optional[int] = None, voltage: Optional[float] = None
     """
     if voltage is None:
         _, voltage = read_soil_raw()
-    return read_soil_percent_from_voltage(voltage, debug=debug)
+    return read_soil_percent_from_voltage(voltage, limits)
 
 
 BH1750_ADDR = 0x23
-BH1750_MODE = 0x10
+BH1750_MODE = 0x10  # continuous high-resolution mode
+BH1750_MEASURE_S = 0.18  # worst-case high-resolution conversion time (datasheet)
+_BH1750_LUX_PER_COUNT = 1 / 1.2  # datasheet: lux = count / 1.2 in high-resolution mode
+
+# time.monotonic() at which the first conversion after start-up is ready; None until the
+# sensor has been put into continuous mode.
+_bh1750_ready_at: Optional[float] = None
+# /dev/i2c-1, opened on first use and kept open for the life of the process.
+_bus1: Optional[smbus2.SMBus] = None
+# 2-byte read message for the BH1750 result, created with the bus and reused by every
+# read (always under _i2c_lock, so the buffer is never shared between two transfers).
+_bh1750_read_msg: Optional[Any] = None
 
 
 def read_bh1750_lux() -> Optional[float]:
     """
     Reads the ambient light intensity in Lux from the BH1750 sensor.
 
+    The sensor stays in continuous high-resolution mode, so only the first call waits
+    for a conversion; later calls fetch the latest result with a single 2-byte read.
+    _i2c_lock is held only around the bus transactions, not during that wait.
+
     Returns:
         Optional[float]: The light intensity in Lux, or None on failure.
     """
+    global _bh1750_ready_at, _bus1, _bh1750_read_msg
     try:
-        bus = smbus2.SMBus(1)
-        bus.write_byte(BH1750_ADDR, BH1750_MODE)
-        time.sleep(0.2)
-        data = bus.read_i2c_block_data(BH1750_ADDR, BH1750_MODE, 2)
-        lux = (data[0] << 8 | data[1]) / 1.2
+        with _i2c_lock:
+            if _bus1 is None:
+                _bus1 = smbus2.SMBus(1)
+                _bh1750_read_msg = smbus2.i2c_msg.read(BH1750_ADDR, 2)
+            if _bh1750_ready_at is None:
+                _bus1.i2c_rdwr(smbus2.i2c_msg.write(BH1750_ADDR, [BH1750_MODE]))
+                _bh1750_ready_at = time.monotonic() + BH1750_MEASURE_S
+            ready_at = _bh1750_ready_at
+        delay = ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        # The result is read without a command byte, so this is one I2C transaction.
+        with _i2c_lock:
+            if _bus1 is None:
+                raise OSError("I2C bus was closed")
+            _bus1.i2c_rdwr(_bh1750_read_msg)
+            hi, lo = list(_bh1750_read_msg)
+        lux = (hi << 8 | lo) * _BH1750_LUX_PER_COUNT
         return round(lux, 2)
     except Exception as e:
-        print(f"[WARN] BH1750 očitanje nije uspjelo: {e}")
+        # e.g. the sensor lost power; reopen the bus and start it again on the next call
+        close_bh1750_bus()
+        log.warning("BH1750 očitanje nije uspjelo: %s", e)
         return None
 
 
-def test_dht() -> Tuple[Optional[float], Optional[float]]:
+def close_bh1750_bus() -> None:
+    """Closes /dev/i2c-1 if read_bh1750_lux() opened it."""
+    global _bus1, _bh1750_ready_at
+    with _i2c_lock:
+        if _bus1 is not None:
+            _bus1.close()
+            _bus1 = None
+        _bh1750_ready_at = None
+
+
+atexit.register(close_bh1750_bus)
+
+
+# The DHT22 delivers a new sample at most every 2 s; Adafruit_DHT.read_retry's default of
+# 15 attempts 2 s apart could block a caller for ~30 s, so only a few attempts are made.
+DHT_MIN_INTERVAL_S = 2.0
+DHT_ATTEMPTS = 3
+# How long the last good reading may stand in for a failed one.
+DHT_MAX_AGE_S = 60.0
+
+# How long a caller waits for another thread's DHT22 read before giving up.
+DHT_LOCK_TIMEOUT_S = 1.0
+
+_dht_lock = threading.Lock()
+# (time.monotonic() of the read, humidity, temperature) of the last successful read
+_last_dht: Optional[Tuple[float, float, float]] = None
+
+
+class SensorBusy(RuntimeError):
+    """Raised when a sensor is being read by another thread and no recent reading is available."""
+
+
+def read_dht22() -> Tuple[Optional[float], Optional[float]]:
     """
-    Reads temperature and humidity from the DHT22 sensor.
+    Reads the DHT22 sensor.
+
+    A reading younger than DHT_MIN_INTERVAL_S is returned without touching the sensor.
+    If all DHT_ATTEMPTS attempts fail, the last good reading is returned as long as it
+    is at most DHT_MAX_AGE_S old. The same applies when another thread is still reading
+    the sensor after DHT_LOCK_TIMEOUT_S, so concurrent callers do not queue up behind
+    a read that can take several seconds.
 
     Returns:
-        Tuple[Optional[float], Optional[float]]: Temperature (C) and humidity (%), or (None, None).
+        Tuple[Optional[float], Optional[float]]: Humidity (%) and temperature (C), or (None, None).
+
+    Raises:
+        SensorBusy: If another thread is reading the sensor and there is no usable last reading.
     """
+    global _last_dht
+    if not _dht_lock.acquire(timeout=DHT_LOCK_TIMEOUT_S):
+        last = _last_dht
+        if last is not None and time.monotonic() - last[0] <= DHT_MAX_AGE_S:
+            return last[1], last[2]
+        raise SensorBusy("DHT22 se upravo očitava")
     try:
-        import Adafruit_DHT
-        humidity, temperature = Adafruit_DHT.read_retry(DHT_SENSOR, DHT_PIN)
-        return temperature, humidity
-    except Exception:
+        if _last_dht is not None and time.monotonic() - _last_dht[0] < DHT_MIN_INTERVAL_S:
+            return _last_dht[1], _last_dht[2]
+        humidity, temperature = None, None
+        try:
+            humidity, temperature = Adafruit_DHT.read_retry(
+                DHT_SENSOR, DHT_PIN, retries=DHT_ATTEMPTS, delay_seconds=DHT_MIN_INTERVAL_S
+            )
+        except Exception as e:
+            log.error("DHT22 Greška: %s", e)
+        now = time.monotonic()
+        if humidity is not None and temperature is not None:
+            _last_dht = (now, humidity, temperature)
+            return humidity, temperature
+        if _last_dht is not None and now - _last_dht[0] <= DHT_MAX_AGE_S:
+            return _last_dht[1], _last_dht[2]
         return None, None
+    finally:
+        _dht_lock.release()
 
 
-def test_ds18b20() -> Optional[float]:
+SensorReadings = namedtuple(
+    "SensorReadings", ["soil_raw", "soil_voltage", "lux", "humidity", "temperature", "temp_ds18b20"]
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _sensor_pool() -> ThreadPoolExecutor:
+    """Returns the worker pool for read_all_sensors(), created on first use."""
+    # one worker per bus: I2C (ADS1115 + BH1750), GPIO (DHT22), 1-Wire (DS18B20)
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="sensor")
+
+
+def _read_i2c_sensors(read_soil: Callable[[], Tuple[Optional[int], Optional[float]]]) -> Tuple[Optional[int], Optional[float], Optional[float]]:
+    """Reads the sensors on /dev/i2c-1 one after the other, since they share the bus anyway."""
+    soil_raw, soil_voltage = read_soil()
+    return soil_raw, soil_voltage, read_bh1750_lux()
+
+
+# The read_all_sensors() call in progress, shared with callers that arrive meanwhile.
+_all_sensors_inflight: Optional[Future] = None
+_all_sensors_lock = threading.Lock()
+
+
+def read_all_sensors(cold: bool = False) -> SensorReadings:
     """
-    Reads the soil temperature from the DS18B20 sensor.
+    Reads every sensor, overlapping the waits on the I2C, GPIO and 1-Wire buses.
+
+    The DHT22 and DS18B20 each take up to a few seconds, mostly waiting on the sensor,
+    so the total time is that of the slowest bus instead of the sum of all reads.
+    Callers that arrive while a (non-cold) read is in progress wait for it and get its
+    readings, instead of reading every sensor again.
+
+    Args:
+        cold (bool): If True, the ADS1115 is read over a freshly created I2C bus.
+
+    Returns:
+        SensorReadings: The raw readings; failed reads are None.
     """
-    return read_ds18b20_temp()
+    global _all_sensors_inflight
+    if cold:
+        return _read_all_sensors(cold)
+    with _all_sensors_lock:
+        shared = _all_sensors_inflight
+        if shared is None:
+            future = _all_sensors_inflight = Future()
+    if shared is not None:
+        return shared.result()
+    try:
+        readings = _read_all_sensors(cold)
+        future.set_result(readings)
+        return readings
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _all_sensors_lock:
+            _all_sensors_inflight = None
+
+
+def _read_all_sensors(cold: bool) -> SensorReadings:
+    """Reads every sensor through the worker pool; see read_all_sensors()."""
+    pool = _sensor_pool()
+    i2c = pool.submit(_read_i2c_sensors, read_soil_raw_fresh if cold else read_soil_raw_shared)
+    dht = pool.submit(read_dht22)
+    ds18b20 = pool.submit(read_ds18b20_temp)
+    soil_raw, soil_voltage, lux = i2c.result()
+    humidity, temperature = dht.result()
+    return SensorReadings(soil_raw, soil_voltage, lux, humidity, temperature, ds18b20.result())
+
+
+def test_dht() -> Tuple[Optional[float], Optional[float]]:
+    """
+    Reads temperature and humidity from the DHT22 sensor.
+
+    Returns:
+        Tuple[Optional[float], Optional[float]]: Temperature (C) and humidity (%), or (None, None).
+    """
+    humidity, temperature = read_dht22()
+    return temperature, humidity
+
+
+# Kept under the name used by the logger CLI and the webserver.
+test_ds18b20 = read_ds18b20_temp
 
 
 def test_ads() -> None:
     """Tests the ADS1115 sensor and prints the readings."""
     raw, voltage = read_soil_raw()
-    pct = read_soil_percent_from_voltage(voltage, debug=True)
+    limits = _calibration_limits()
+    pct = read_soil_percent_from_voltage(voltage, limits)
+    dry_v, wet_v, _ = limits
     print(f"ADS1115 channel 0: raw={raw}, voltage={0.0 if voltage is None else round(voltage,3)} V - {datetime.datetime.now()}")
-    print(f"Soil moisture: {pct:.3f} %")
+    print(f"Soil moisture: {pct:.3f} %  [dry_v={dry_v:.4f} V, wet_v={wet_v:.4f} V]")
 
 
 def calibrate_ads(dry: bool = False, wet: bool = False) -> None:
@@ -254,6 +586,5 @@ def calibrate_ads(dry: bool = False, wet: bool = False) -> None:
     if wet:
         calib["wet_v"] = float(voltage)
         print(f"Snima se WET referenca (V): {voltage:.3f} V  [raw={raw}]")
-    with open(CALIB_FILE, "w") as f:
-        json.dump(calib, f)
+    _save_calibration(calib)
     print("Kalibracija spremljena:", calib)
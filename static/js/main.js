@@ -218,7 +218,7 @@ document.addEventListener("DOMContentLoaded", () => {
             const res = await fetchJSON('/api/run/stop', { method: 'POST' });
             document.getElementById('loggerStatus').innerText = res.running ? "AKTIVAN" : "STOPIRAN";
         });
-        ['ads', 'dht', 'ds18b20', 'bh1750'].forEach(id => document.getElementById(`btn-${id}`).addEventListener('click', () => readSensor(id)));
+        ['ads', 'dht', 'ds18b20', 'bh1750', 'all'].forEach(id => document.getElementById(`btn-${id}`).addEventListener('click', () => readSensor(id)));
         [1, 2].forEach(num => document.getElementById(`btn-relay${num}`).addEventListener('click', () => toggleRelay(num)));
         setupDeleteRowsHandler(updateIndexPageData);
 
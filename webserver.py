@@ -1,36 +1,136 @@
 import os
+import json
+import atexit
+import functools
+import gzip
+import hashlib
+import itertools
+import logging
+import logging.handlers
+import queue
+import select
 import sqlite3
 import subprocess
 import threading
-import time
-from typing import List, Dict, Any, Tuple, Optional
-import datetime
+from typing import Dict, Any, Iterator, Tuple, Optional, Union
 import sys
 
 import relays
 import config
-from flask import Flask, render_template, jsonify, request
+import database
+from flask import Flask, render_template, jsonify, request, stream_with_context
 
-from config import BASE_DIR, DB_FILE, RELAY1, RELAY2
+try:
+    import orjson  # optional: C JSON encoder for the large /api/logs responses
+except ImportError:
+    orjson = None
+
+from config import BASE_DIR, RELAY1, RELAY2
 from relays import get_relay_state
 import sensors
 from sensors import read_bh1750_lux
 
+log = logging.getLogger(__name__)
+
+# Relays the web UI may switch, by the name used in requests and in relay_log.
+RELAY_PINS: Dict[str, int] = {"RELAY1": RELAY1, "RELAY2": RELAY2}
+
 app = Flask(__name__, template_folder=os.path.join(BASE_DIR, "templates"))
 
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class ORJSONProvider(DefaultJSONProvider):
+        """Serves jsonify() and request.json through orjson, keeping Flask's fallback for other types."""
+
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj, default=self.default).decode()
+
+        def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
+
+@app.teardown_appcontext
+def release_db_connection(exc: Optional[BaseException] = None) -> None:
+    """Returns the request thread's database connection to the pool when the request ends."""
+    database.release_connection()
+
+
 logger_lock = threading.Lock()
 logger_process: Optional[subprocess.Popen] = None
 logger_logfile = os.path.join(BASE_DIR, "logger_run.log")
+# Seconds a freshly started logger must survive to count as started.
+LOGGER_START_GRACE = 0.2
+# Seconds to wait after SIGTERM before the logger is killed.
+LOGGER_STOP_TIMEOUT = 2.0
+# Bytes from the end of the logger's output shown by /logs/file.
+LOGFILE_TAIL_BYTES = 20000
+
+
+_log_fd: Optional[int] = None
+
+
+def _logger_log_fd() -> int:
+    """
+    Returns the descriptor the logger's output is appended to, opening it on first use.
+
+    The file is opened once with O_APPEND and handed to every started logger, so
+    restarts do not reopen it and each write lands at the end of the file.
+    """
+    global _log_fd
+    if _log_fd is None:
+        _log_fd = os.open(logger_logfile, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    return _log_fd
+
+
+def close_logger_log() -> None:
+    """Closes the shared logger output descriptor, if it is open."""
+    global _log_fd
+    if _log_fd is not None:
+        os.close(_log_fd)
+        _log_fd = None
+
+
+atexit.register(close_logger_log)
 
 
 def is_logger_running() -> bool:
-    """Checks if the logger subprocess is currently running."""
-    global logger_process
-    if logger_process is None:
-        return False
-    if logger_process.poll() is None:
+    """
+    Checks if the logger subprocess is currently running.
+
+    Read-only and lock-free: the process reference is read once into a local, so
+    status handlers never wait for a start or stop in progress.
+    """
+    proc = logger_process
+    return proc is not None and proc.poll() is None
+
+
+# pidfd of logger_process (Linux), opened at start and used for the start and stop waits;
+# only touched with logger_lock held.
+_logger_pidfd: Optional[int] = None
+
+
+def _set_logger_process_locked(proc: Optional[subprocess.Popen]) -> None:
+    """Replaces logger_process, opening a pidfd for the new process; call with logger_lock held."""
+    global logger_process, _logger_pidfd
+    if _logger_pidfd is not None:
+        os.close(_logger_pidfd)
+        _logger_pidfd = None
+    logger_process = proc
+    if proc is not None and hasattr(os, "pidfd_open"):
+        try:
+            _logger_pidfd = os.pidfd_open(proc.pid)
+        except OSError:
+            pass
+
+
+def _is_logger_running_locked() -> bool:
+    """Like is_logger_running(), but also drops a finished process; call with logger_lock held."""
+    if is_logger_running():
         return True
-    logger_process = None
+    _set_logger_process_locked(None)
     return False
 
 
@@ -44,75 +144,92 @@ def start_logger(mode: str = "run") -> Tuple[bool, str]:
     Returns:
         Tuple[bool, str]: A tuple containing a success flag and a message.
     """
-    global logger_process
     with logger_lock:
-        if is_logger_running():
+        if _is_logger_running_locked():
             return False, "already_running"
         logger_py = os.path.join(BASE_DIR, "logger.py")
         if not os.path.isfile(logger_py):
             return False, f"logger.py not found at {logger_py}"
-        cmd = [sys.executable, logger_py, mode]
-        logfile = open(logger_logfile, "a")
-        proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdout=logfile, stderr=logfile)
-        logger_process = proc
-        time.sleep(0.2)
-        if proc.poll() is None:
+        # -u: the logger's prints reach the log file as they happen, not when a pipe buffer fills
+        cmd = [sys.executable, "-u", logger_py, mode]
+        proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdout=_logger_log_fd(), stderr=subprocess.STDOUT)
+        _set_logger_process_locked(proc)
+        # A child that dies right away is reported immediately; one that is still
+        # running after the grace period counts as started.
+        if not _wait_for_exit(proc, LOGGER_START_GRACE, _logger_pidfd):
             return True, f"started pid={proc.pid}"
-        else:
-            return False, "failed_to_start"
+        return False, f"failed_to_start (exit code {proc.returncode})"
+
+
+def _wait_for_exit(proc: subprocess.Popen, timeout: float, pidfd: Optional[int] = None) -> bool:
+    """
+    Waits up to timeout seconds for a child process to exit.
+
+    With a pidfd (Linux) the wait is a select() that returns as soon as the kernel
+    reports the exit; otherwise it falls back to Popen.wait(), which polls.
+
+    Args:
+        proc (subprocess.Popen): The child process.
+        timeout (float): The maximum time to wait, in seconds.
+        pidfd (Optional[int]): A pidfd for proc, if one is open.
+
+    Returns:
+        bool: True if the process has exited, False if it is still running.
+    """
+    if pidfd is not None:
+        select.select([pidfd], [], [], timeout)
+        return proc.poll() is not None
+    try:
+        proc.wait(timeout=timeout)
+        return True
+    except subprocess.TimeoutExpired:
+        return False
 
 
 def stop_logger() -> Tuple[bool, str]:
     """Stops the logger subprocess."""
-    global logger_process
     with logger_lock:
-        if not is_logger_running():
+        if not _is_logger_running_locked():
             try:
                 with open(config.STATUS_FILE, "w") as f:
                     f.write("STOPPED\n")
             except Exception as e:
-                print(f"[WARN] Ne mogu pisati u STATUS_FILE: {e}")
+                log.warning("Ne mogu pisati u STATUS_FILE: %s", e)
             return False, "not_running"
 
         try:
             logger_process.terminate()
-            for _ in range(10):
-                if logger_process.poll() is not None:
-                    break
-                time.sleep(0.2)
-            if logger_process.poll() is None:
+            if not _wait_for_exit(logger_process, LOGGER_STOP_TIMEOUT, _logger_pidfd):
                 logger_process.kill()
+                logger_process.wait()
 
             pid = logger_process.pid
-            logger_process = None
-            time.sleep(0.1)
+            _set_logger_process_locked(None)
             with open(config.STATUS_FILE, "w") as f:
                 f.write("-.-")
             return True, f"stopped pid={pid}"
         except Exception as e:
-            print(f"[ERROR] stop_logger(): {e}")
+            log.error("stop_logger(): %s", e)
             return False, f"error:{e}"
 
 
-def get_last_logs(limit: int = 100) -> List[Dict[str, Any]]:
-    """Retrieves the last N log entries from the database."""
+@functools.lru_cache(maxsize=4)
+def _log_rows(version: Tuple[int, int], limit: int) -> Tuple[Tuple, ...]:
+    """Fetches the newest log rows for rendering, cached per table version like _logs_json()."""
+    return tuple(database.get_log_rows(limit))
+
+
+def get_last_logs(limit: int = 100) -> Tuple[Tuple, ...]:
+    """
+    Retrieves the last N log entries from the database as namedtuples for rendering.
+
+    Page loads while no rows were added or deleted reuse the previous rows; the only
+    query is then get_logs_version().
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT id, timestamp, dht22_air_temp, dht22_humidity, ds18b20_soil_temp, soil_raw, soil_voltage, soil_percent, lux, stable FROM logs ORDER BY id DESC LIMIT ?", (limit,))
-        rows = c.fetchall()
-        rows.reverse()
-        result = []
-        for r in rows:
-            result.append({
-                "id": r[0], "timestamp": r[1], "air_temp": r[2], "air_humidity": r[3],
-                "soil_temp": r[4], "soil_raw": r[5], "soil_voltage": r[6],
-                "soil_percent": r[7], "lux": r[8], "stable": r[9]
-            })
-        conn.close()
-        return result
+        return _log_rows(database.get_logs_version(), limit)
     except Exception:
-        return []
+        return ()
 
 
 @app.route("/")
@@ -139,56 +256,153 @@ def api_run_stop():
 
 @app.route("/api/run/status", methods=["GET"])
 def api_run_status():
-    return jsonify({"running": is_logger_running(),
-                    "pid": None if logger_process is None else logger_process.pid})
+    # one read of the global, so "running" and "pid" describe the same process
+    proc = logger_process
+    running = proc is not None and proc.poll() is None
+    return jsonify({"running": running, "pid": None if proc is None else proc.pid})
+
+
+def _dumps(obj: Any) -> Union[str, bytes]:
+    """Serializes to JSON, with orjson when it is installed (which returns bytes)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+@functools.lru_cache(maxsize=8)
+def _logs_json(version: Tuple[int, int], limit: int) -> Union[str, bytes]:
+    """
+    Serializes the newest logs for /api/logs, cached per table version.
+
+    Args:
+        version (Tuple[int, int]): database.get_logs_version(); a new version misses the cache.
+        limit (int): The maximum number of rows.
+
+    Returns:
+        Union[str, bytes]: The rows as a JSON array.
+    """
+    return _dumps(database.get_logs(limit))
+
+
+@functools.lru_cache(maxsize=8)
+def _logs_json_gzip(version: Tuple[int, int], limit: int) -> bytes:
+    """Gzips the cached _logs_json() body, once per table version and limit."""
+    body = _logs_json(version, limit)
+    if isinstance(body, str):
+        body = body.encode()
+    return gzip.compress(body, compresslevel=6)
+
+
+# Smaller /api/logs bodies are sent uncompressed; gzip would barely shrink them.
+GZIP_MIN_BYTES = 500
+
+
+# Rows serialized per chunk of a streamed /api/logs/all response.
+STREAM_CHUNK_ROWS = 500
+
+
+def _json_array_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Serializes rows as one JSON array, yielding it in chunks of STREAM_CHUNK_ROWS rows.
+
+    rows is closed when the array is done or the client goes away, so a database
+    iterator hands its connection back right away.
+    """
+    try:
+        yield b"["
+        sep = b""
+        while True:
+            chunk = list(itertools.islice(rows, STREAM_CHUNK_ROWS))
+            if not chunk:
+                break
+            # dumping the chunk as a list and dropping its brackets keeps one encoder call per chunk;
+            # orjson's bytes are sent as they are, only the stdlib's str needs encoding
+            body = _dumps(chunk)
+            if isinstance(body, str):
+                body = body.encode()
+            yield sep + body[1:-1]
+            sep = b","
+        yield b"]"
+    finally:
+        close = getattr(rows, "close", None)
+        if close is not None:
+            close()
+
+
+def _logs_etag() -> str:
+    """Returns the ETag for the current contents of the logs table."""
+    max_id, deletes = database.get_logs_version()
+    return f"{max_id}-{deletes}"
 
 
 @app.route("/api/logs", methods=["GET"])
 def api_logs():
+    """
+    Returns the newest logs as JSON.
+
+    Dashboards poll this endpoint; while no rows were added or deleted, the cached body
+    is reused and a client that sends a matching If-None-Match gets a 304. Clients that
+    accept gzip get the body compressed (the repeated field names shrink well), also cached.
+    """
     limit = int(request.args.get("limit", 100))
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("""
-        SELECT id, timestamp,
-               dht22_air_temp AS air_temp,
-               dht22_humidity AS air_humidity,
-               ds18b20_soil_temp AS soil_temp,
-               soil_percent,
-               lux,
-               stable
-        FROM logs
-        ORDER BY id DESC
-        LIMIT ?
-    """, (limit,))
-    rows = [dict(r) for r in c.fetchall()]
-    rows.reverse()
-    conn.close()
-    return jsonify(rows)
+    version = database.get_logs_version()
+    etag = f"{version[0]}-{version[1]}"
+    body = _logs_json(version, limit)
+    if len(body) >= GZIP_MIN_BYTES and request.accept_encodings["gzip"]:
+        resp = app.response_class(_logs_json_gzip(version, limit), mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+        # weak, since the bytes differ from the identity body; If-None-Match compares weakly
+        resp.set_etag(etag, weak=True)
+    else:
+        resp = app.response_class(body, mimetype="application/json")
+        resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    return resp.make_conditional(request)
 
 
 @app.route("/api/logs/all")
 def api_logs_all():
+    """
+    Returns all logs matching the optional where filter as a streamed JSON array.
+
+    Rows are serialized while they are fetched, so the whole table is never held in
+    memory. The response carries an ETag, and an unchanged table is answered with a 304.
+    """
     where = request.args.get("where", "")
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    query = "SELECT id, timestamp, dht22_air_temp AS air_temp, dht22_humidity AS air_humidity, ds18b20_soil_temp AS soil_temp, soil_percent, lux, stable FROM logs"
-    if where:
-        query += f" WHERE {where}"
-    query += " ORDER BY id ASC"
+    etag = _logs_etag()
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
     try:
-        c.execute(query)
-        rows = [dict(r) for r in c.fetchall()]
-    except Exception as e:
+        rows = database.iter_logs_where(where)
+    except (ValueError, sqlite3.Error) as e:
         return jsonify({"ok": False, "error": str(e)}), 400
-    conn.close()
-    return jsonify(rows)
+    # the rows iterator holds its own database connection until it is exhausted or closed;
+    # the request's connection is released by teardown before the first chunk is sent
+    resp = app.response_class(stream_with_context(_json_array_chunks(rows)), mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
+
+
+@functools.lru_cache(maxsize=1)
+def _all_data_html() -> Tuple[str, str]:
+    """
+    Renders the /all_data page once; it is a static shell that loads its data over XHR.
+
+    Returns:
+        Tuple[str, str]: The rendered HTML and its ETag.
+    """
+    html = render_template("all_data.html")
+    return html, hashlib.blake2b(html.encode(), digest_size=8).hexdigest()
 
 
 @app.route("/all_data")
 def all_data_page():
-    return render_template("all_data.html")
+    html, etag = _all_data_html()
+    resp = app.response_class(html, mimetype="text/html")
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 
 @app.route("/api/sensor/read", methods=["GET"])
@@ -208,37 +422,61 @@ def api_sensor_read():
         elif t == "bh1750":
             lux = read_bh1750_lux()
             return jsonify({"type": "bh1750", "lux": lux})
+        elif t == "all":
+            readings = sensors.read_all_sensors()
+            pct = sensors.read_soil_percent_from_voltage(readings.soil_voltage)
+            return jsonify({"type": "all", "percent": pct, **readings._asdict()})
         else:
             return jsonify({"error": "unknown sensor type"}), 400
+    except sensors.SensorBusy as e:
+        return jsonify({"error": "busy", "msg": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/relay/toggle", methods=["POST"])
 def api_relay_toggle():
+    # malformed input is a 400 up front, so the 500 below only ever means a hardware/DB failure
+    data = request.get_json(silent=True)
     try:
-        data = request.get_json(force=True)
-        relay_num = int(data.get("relay"))
-        state = bool(data.get("state"))
+        relay_num = int(data["relay"])
+        # true/false or 1/0; a string such as "false" would otherwise be truthy
+        if data["state"] not in (True, False):
+            raise ValueError("state must be true or false")
+        state = bool(data["state"])
         relay_name = f"RELAY{relay_num}"
-        relay_pin = getattr(config, relay_name)
+        relay_pin = RELAY_PINS[relay_name]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "error": "Neispravan zahtjev: očekuje se {\"relay\": 1|2, \"state\": true|false}"}), 400
+    try:
         relays.set_relay_state(relay_pin, state)
-        import database
         database.insert_relay_event(relay_name, "ON" if state else "OFF", source="button")
-        print(f"[LOG] {relay_name} -> {'ON' if state else 'OFF'} (ručno putem web sučelja)")
+        log.info("%s -> %s (ručno putem web sučelja)", relay_name, "ON" if state else "OFF")
         return jsonify({"ok": True, "relay": relay_name, "state": "ON" if state else "OFF"})
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Promjena releja nije uspjela")
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
 @app.route("/logs/file")
 def get_logfile():
-    if os.path.isfile(logger_logfile):
-        with open(logger_logfile, "r") as f:
-            return "<pre>" + f.read()[-20000:] + "</pre>"
-    return "No logfile found."
+    try:
+        with open(logger_logfile, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            # the file is only appended to, so its size identifies the content
+            etag = str(size)
+            if request.if_none_match.contains_weak(etag):
+                resp = app.response_class(status=304)
+            else:
+                # only the tail is read, however large the file has grown
+                f.seek(max(0, size - LOGFILE_TAIL_BYTES))
+                # sent as the raw bytes; the browser shows text/plain preformatted, so no decoding or <pre> wrapper
+                resp = app.response_class(f.read(), mimetype="text/plain")
+    except FileNotFoundError:
+        return "No logfile found."
+    resp.set_etag(etag, weak=True)
+    resp.cache_control.max_age = 2
+    return resp
 
 
 @app.route("/api/logs/delete", methods=["POST"])
@@ -246,29 +484,17 @@ def api_logs_delete():
     data = request.json
     ids = data.get("ids", "")
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
         if isinstance(ids, str) and ids.strip().lower() == "all":
-            c.execute("DELETE FROM logs")
-            conn.commit()
+            database.delete_all_logs()
             deleted = "all"
         else:
-            id_list = []
-            for part in ids.split(','):
-                part = part.strip()
-                if '-' in part:
-                    start, end = part.split('-')
-                    id_list.extend(range(int(start), int(end) + 1))
-                else:
-                    id_list.append(int(part))
-
-            if not id_list:
+            try:
+                ranges = database.parse_id_ranges(ids)
+            except ValueError as e:
+                return jsonify({"ok": False, "msg": str(e)}), 400
+            if not ranges:
                 return jsonify({"ok": False, "msg": "Nema ID-eva za brisanje"}), 400
-            placeholders = ",".join("?" for _ in id_list)
-            c.execute(f"DELETE FROM logs WHERE id IN ({placeholders})", id_list)
-            conn.commit()
-            deleted = len(id_list)
-        conn.close()
+            deleted = database.delete_log_ranges(ranges)
         return jsonify({"ok": True, "deleted": deleted})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -277,33 +503,40 @@ def api_logs_delete():
 @app.route("/toggle_relay/<relay_id>", methods=["POST"])
 def toggle_relay(relay_id: str):
     state = request.form.get("state")
-    relay_pin = getattr(config, relay_id)
+    relay_pin = RELAY_PINS.get(relay_id)
+    if relay_pin is None:
+        return jsonify({"ok": False, "error": f"Nepoznat relej: {relay_id}"}), 400
     relays.set_relay_state(relay_pin, state == "ON")
     try:
-        import database
         database.insert_relay_event(relay_id, state, source="button")
-        print(f"[LOG] Relej {relay_id} -> {state}")
+        log.info("Relej %s -> %s", relay_id, state)
     except Exception as e:
-        print(f"[WARN] Relay log upis nije uspio: {e}")
+        log.warning("Relay log upis nije uspio: %s", e)
     return jsonify({"ok": True, "relay": relay_id, "state": state})
 
 
 @app.route("/relay_log_data")
 def relay_log_data():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT timestamp, relay_name, action FROM relay_log ORDER BY timestamp DESC LIMIT 10")
-    rows = cur.fetchall()
-    conn.close()
+    """
+    Returns the last relay events for the dashboard chart.
+
+    The response carries an ETag of the relay_log version; a poll while no event
+    was logged is answered with a 304 without reading or formatting the events.
+    """
+    etag = str(database.get_relay_log_version())
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
     data = []
-    for ts, relay, action in rows:
-        try:
-            t = datetime.datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M:%S")
-            value = 1 if action.upper() == "ON" else 0
-            data.append({"t": t, "relay": relay.upper(), "v": value, "action": action.upper()})
-        except Exception as e:
-            print(f"[WARN] relay_log_data parse error: {e}")
-    return jsonify(data)
+    for t, relay, action, source in database.get_relay_events(10):
+        if t is None:
+            log.warning("relay_log_data: neispravan timestamp za %s %s", relay, action)
+            continue
+        data.append({"t": t, "relay": relay, "v": 1 if action == "ON" else 0, "action": action, "source": source})
+    resp = jsonify(data)
+    resp.set_etag(etag)
+    return resp
 
 
 @app.route("/api/status")
@@ -315,5 +548,35 @@ def api_status():
     else:
         return {"status": "Logger nije pokrenut"}
 
+
+def _setup_logging() -> None:
+    """
+    Sends log records (ours and Werkzeug's request log) through a queue to stderr.
+
+    Request threads only enqueue the record; a QueueListener thread formats and writes it,
+    so a slow terminal or journal never holds up a response.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] - %(message)s", "%Y-%m-%d %H:%M:%S"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    listener.start()
+    atexit.register(listener.stop)
+
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    _setup_logging()
+    # One process, many threads: the logger subprocess and the relay pins are owned by
+    # this process, so it must not be split across several worker processes.
+    try:
+        from waitress import serve  # optional: production WSGI server with a fixed thread pool
+    except ImportError:
+        serve = None
+    if serve is not None and not os.environ.get("CHILLI_DEV"):
+        # database.IDLE_CONNECTIONS_MAX follows WEB_THREADS, so each thread can reuse a connection
+        serve(app, host="0.0.0.0", port=5000, threads=config.WEB_THREADS)
+    else:
+        app.run(host="0.0.0.0", port=5000, threaded=True)